@@ -0,0 +1,361 @@
+import asyncio
+import logging
+import time
+from http import HTTPStatus
+
+import aiohttp
+
+import homework
+import metrics
+from checkpoints import SentCheckpoints
+from deadline import Deadline
+from delivery import DeliveryQueue
+from exceptions import (UnavailabilityEndpoint,
+                        RequestFailureEndpoint,
+                        SendMessageTelegramError
+                        )
+from response_cache import fingerprint
+from schema import loads
+
+logger = logging.getLogger(__name__)
+
+PERMANENT_ERROR_CODES = (
+    HTTPStatus.BAD_REQUEST,
+    HTTPStatus.UNAUTHORIZED,
+    HTTPStatus.FORBIDDEN,
+)
+
+
+async def get_api_answer_async(session: aiohttp.ClientSession,
+                               semaphore: asyncio.Semaphore,
+                               headers: dict,
+                               current_timestamp: int) -> dict:
+    """Асинхронный запрос к эндпоинту API-сервиса Практикум.Домашка."""
+    _, _, body = await fetch_api_answer_async(
+        session, semaphore, headers, current_timestamp
+    )
+    return loads(body)
+
+
+async def fetch_api_answer_async(session: aiohttp.ClientSession,
+                                 semaphore: asyncio.Semaphore,
+                                 headers: dict,
+                                 current_timestamp: int,
+                                 seconds: float = None) -> tuple:
+    """Асинхронный запрос статусов без разбора тела.
+
+    Возвращает статус-код, заголовки и тело ответа; кроме 200
+    допускается 304 на условный запрос. Срок `seconds` отсчитывается
+    с момента, когда запрос получил место в семафоре, поэтому ожидание
+    своей очереди сбоем API не считается.
+    """
+    timestamp = current_timestamp or int(time.time())
+    params = {'from_date': timestamp}
+    async with semaphore:
+        deadline = None if seconds is None else Deadline(seconds)
+        try:
+            return await asyncio.wait_for(
+                request_statuses_async(session, headers, params),
+                None if deadline is None else deadline.remaining()
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            metrics.API_RESPONSES.inc('error')
+            if deadline is not None and deadline.expired:
+                metrics.CYCLE_OVERRUNS.inc()
+                deadline.check('запрос к API')
+            raise RequestFailureEndpoint(
+                f'Сбой при запросе к эндпоинту: {error}'
+                f'Параметры запроса {homework.ENDPOINT}, {headers}, {params}'
+            )
+
+
+async def request_statuses_async(session: aiohttp.ClientSession,
+                                 headers: dict,
+                                 params: dict) -> tuple:
+    """Один запрос статусов к API."""
+    started = time.monotonic()
+    async with session.get(
+        homework.ENDPOINT, headers=headers, params=params
+    ) as response:
+        metrics.API_LATENCY.observe(time.monotonic() - started)
+        metrics.API_RESPONSES.inc(response.status)
+        if response.status not in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+            text = await response.text()
+            raise UnavailabilityEndpoint(
+                'Эндпоинт недоступен. '
+                f'Статус-код ответа API: {response.status}'
+                f'{text}'
+                f'Параметры запроса: {homework.ENDPOINT}, '
+                f'{headers}, {params}',
+                status_code=response.status
+            )
+        body = await response.read()
+        return response.status, response.headers, body
+
+
+async def send_message_async(session: aiohttp.ClientSession,
+                             semaphore: asyncio.Semaphore,
+                             chat_id,
+                             message: str) -> None:
+    """Асинхронно отправляем сообщение через Telegram Bot API."""
+    url = (
+        f'{homework.TELEGRAM_API_URL}/bot{homework.TELEGRAM_TOKEN}'
+        '/sendMessage'
+    )
+    logger.debug('Начинаем отправлять сообщение %s', message)
+    try:
+        async with semaphore:
+            started = time.monotonic()
+            async with session.post(
+                url, json={'chat_id': chat_id, 'text': message}
+            ) as response:
+                result = await response.json(content_type=None)
+            metrics.TELEGRAM_LATENCY.observe(time.monotonic() - started)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        metrics.TELEGRAM_FAILURES.inc()
+        raise SendMessageTelegramError(
+            f'Ошибка при отправке сообщения {message} в Telegram чат'
+        )
+    if not result.get('ok'):
+        metrics.TELEGRAM_FAILURES.inc()
+        error = SendMessageTelegramError(
+            f'Ошибка при отправке сообщения {message} в Telegram чат: '
+            f'{result.get("description")}',
+            permanent=result.get('error_code') in PERMANENT_ERROR_CODES
+        )
+        error.retry_after = (result.get('parameters') or {}).get(
+            'retry_after'
+        )
+        raise error
+    metrics.MESSAGES_SENT.inc()
+    logger.info('В чат успешно отправлено сообщение %s.', message)
+
+
+def create_delivery_async(session: aiohttp.ClientSession,
+                          semaphore: asyncio.Semaphore,
+                          loop: asyncio.AbstractEventLoop,
+                          on_sent=None) -> DeliveryQueue:
+    """Создаём очередь отправки с лимитами синхронного режима.
+
+    Очередь работает в своём потоке и отправляет сообщения корутиной
+    `send_message_async` в цикле событий `loop`; паузы, которые просит
+    Telegram, соблюдаются. Ключи доставленных сообщений передаются в
+    `on_sent(keys)`.
+    """
+    def send(chat_id, message):
+        asyncio.run_coroutine_threadsafe(
+            send_message_async(session, semaphore, chat_id, message), loop
+        ).result()
+
+    return DeliveryQueue(
+        send,
+        chat_rate=homework.TELEGRAM_CHAT_RATE,
+        global_rate=homework.TELEGRAM_GLOBAL_RATE,
+        on_sent=on_sent,
+    )
+
+
+async def deliver(session: aiohttp.ClientSession,
+                  semaphore: asyncio.Semaphore,
+                  notify,
+                  chat_id,
+                  message: str,
+                  key=None) -> None:
+    """Ставим сообщение в очередь `notify` или отправляем напрямую."""
+    if notify is not None:
+        notify(chat_id, message, key)
+        return
+    await send_message_async(session, semaphore, chat_id, message)
+
+
+async def poll_tenant_async(session: aiohttp.ClientSession,
+                            semaphore: asyncio.Semaphore,
+                            tenant,
+                            checkpoints=None,
+                            notify=None) -> None:
+    """Асинхронно выполняем один цикл опроса API для подписки.
+
+    Запрос к API, не уложившийся в `CYCLE_DEADLINE` секунд, отменяется.
+    Сообщения ставятся в очередь `notify(chat_id, message, key)`, а без
+    неё отправляются сразу.
+    """
+    if homework.short_circuit(tenant):
+        return
+    try:
+        await poll_cycle_async(
+            session, semaphore, tenant, checkpoints, notify
+        )
+        message = homework.recovery_message(tenant)
+    except Exception as error:
+        homework.reschedule(tenant, None)
+        message = homework.error_message(tenant, error)
+    if message is not None:
+        await deliver(session, semaphore, notify, tenant.chat_id, message)
+
+
+async def poll_cycle_async(session: aiohttp.ClientSession,
+                           semaphore: asyncio.Semaphore,
+                           tenant,
+                           checkpoints=None,
+                           notify=None) -> None:
+    """Запрашиваем статусы и обрабатываем ответ."""
+    try:
+        answer = await fetch_api_answer_async(
+            session, semaphore,
+            {**tenant.headers,
+             **homework.response_cache.conditional_headers(tenant.tenant_id)},
+            tenant.current_date,
+            homework.CYCLE_DEADLINE
+        )
+    except Exception as error:
+        homework.record_outcome(error)
+        raise
+    homework.record_outcome()
+    await handle_response_async(
+        session, semaphore, tenant, answer, checkpoints, notify
+    )
+
+
+async def handle_response_async(session: aiohttp.ClientSession,
+                                semaphore: asyncio.Semaphore,
+                                tenant,
+                                answer: tuple,
+                                checkpoints=None,
+                                notify=None) -> None:
+    """Разбираем ответ API, если он изменился с прошлого опроса."""
+    cache = homework.response_cache
+    status, headers, body = answer
+    if status == HTTPStatus.NOT_MODIFIED:
+        homework.reschedule(tenant, [])
+        return
+    digest, current_date = fingerprint(body)
+    if cache.is_unchanged(tenant.tenant_id, digest):
+        tenant.current_date = current_date or tenant.current_date
+        homework.reschedule(tenant, [])
+        return
+    response = loads(body)
+    messages = homework.collect_events(tenant, response)
+    for key, message in messages:
+        await deliver(
+            session, semaphore, notify, tenant.chat_id, message, key
+        )
+    tenant.current_date = response.get('current_date')
+    if messages and checkpoints is not None:
+        checkpoints.save(
+            tenant.tenant_id, tenant.checkpoint(homework.STATUSES),
+            messages[-1][0]
+        )
+    homework.reschedule(tenant, response['homeworks'])
+    cache.remember(tenant.tenant_id, headers, digest)
+
+
+async def tenant_loop(session: aiohttp.ClientSession,
+                      semaphore: asyncio.Semaphore,
+                      tenant,
+                      checkpoints=None,
+                      leases=None,
+                      notify=None) -> None:
+    """Опрашиваем подписку в собственном темпе.
+
+    Первый опрос тоже ждёт `tenant.next_poll`, поэтому распределение
+    первых опросов по окну `STARTUP_SPREAD` соблюдается.
+    """
+    while True:
+        await asyncio.sleep(max(0, tenant.next_poll - time.monotonic()))
+        if homework.claim_tenant(tenant, leases, checkpoints):
+            metrics.POLL_LAG.observe(
+                max(0, time.monotonic() - tenant.next_poll)
+            )
+            try:
+                await poll_tenant_async(
+                    session, semaphore, tenant, checkpoints, notify
+                )
+            except SendMessageTelegramError as error:
+                logger.error('%s: %s', tenant, error)
+
+
+async def renew_leases(leases) -> None:
+    """Продлеваем аренды трижды за срок их действия."""
+    while True:
+        await asyncio.sleep(leases.ttl / 3)
+        leases.renew()
+
+
+async def apply_checkpoints(checkpoints: SentCheckpoints) -> None:
+    """Записываем состояния подписок после отправки их сообщений."""
+    while True:
+        await asyncio.sleep(homework.IDLE_WAIT)
+        checkpoints.apply()
+
+
+async def ingest_loop(session: aiohttp.ClientSession,
+                      semaphore: asyncio.Semaphore,
+                      tenants: list,
+                      inbox,
+                      checkpoints=None,
+                      notify=None) -> None:
+    """Отправляем сообщения по событиям приёмника."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, inbox.wait, homework.IDLE_WAIT)
+        messages = []
+        homework.ingest_events(
+            lambda chat_id, message, key=None: messages.append(
+                (chat_id, message, key)
+            ),
+            tenants, inbox.drain(), checkpoints
+        )
+        for chat_id, message, key in messages:
+            try:
+                await deliver(
+                    session, semaphore, notify, chat_id, message, key
+                )
+            except SendMessageTelegramError as error:
+                logger.error('%s: %s', chat_id, error)
+
+
+async def main_async(tenants: list, checkpoints=None, leases=None,
+                     inbox=None) -> None:
+    """Опрашиваем все подписки конкурентно в одном цикле событий.
+
+    Сообщения отправляются через очередь с ограничением частоты, а
+    контрольные точки записываются только после их отправки.
+    """
+    semaphore = asyncio.Semaphore(homework.ASYNC_CONCURRENCY)
+    tasks = [] if leases is None else [renew_leases(leases)]
+    if checkpoints is not None:
+        checkpoints = SentCheckpoints(checkpoints)
+        tasks.append(apply_checkpoints(checkpoints))
+    timeout = aiohttp.ClientTimeout(
+        sock_connect=homework.HTTP_CONNECT_TIMEOUT,
+        sock_read=homework.HTTP_READ_TIMEOUT,
+    )
+    loop = asyncio.get_running_loop()
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        delivery = create_delivery_async(
+            session, semaphore, loop,
+            checkpoints and checkpoints.mark_sent
+        )
+        delivery.start()
+        if inbox is not None:
+            tasks.append(ingest_loop(
+                session, semaphore, tenants, inbox, checkpoints,
+                delivery.put
+            ))
+        try:
+            await asyncio.gather(
+                *tasks,
+                *(tenant_loop(session, semaphore, tenant, checkpoints,
+                              leases, delivery.put)
+                  for tenant in tenants)
+            )
+        finally:
+            await loop.run_in_executor(None, delivery.stop)
+            if checkpoints is not None:
+                checkpoints.apply()
+
+
+def run_async(tenants: list, checkpoints=None, leases=None,
+              inbox=None) -> None:
+    """Запускаем асинхронный цикл опроса."""
+    asyncio.run(main_async(tenants, checkpoints, leases, inbox))
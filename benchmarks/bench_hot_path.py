@@ -0,0 +1,94 @@
+"""Бенчмарк цикла опрос → разбор → уведомление.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_hot_path --tenants 1 100 1000 10000
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import telegram
+
+import homework
+from benchmarks.stub_server import STATUSES_PATH, StubServer
+from tenants import Tenant, pack_homework
+
+BOT_TOKEN = '1234:abcdefg'
+
+
+def percentile(values: list, percent: float) -> float:
+    """Перцентиль по отсортированному списку."""
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
+
+
+def measure_memory(count: int) -> float:
+    """Байт на подписку с заполненным индексом работ."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tenants = [Tenant(f'token{i}', i) for i in range(count)]
+    for tenant in tenants:
+        tenant.seen['1'] = pack_homework(0, 1581604857)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(
+        stat.size_diff for stat in after.compare_to(before, 'filename')
+    )
+    return size / count
+
+
+def run_cycle(bot: telegram.Bot, tenant: Tenant) -> None:
+    """Один полный цикл для подписки."""
+    response = homework.request_homework_statuses(
+        tenant.headers, tenant.current_date
+    )
+    for message in homework.collect_updates(tenant, response):
+        homework.send_message_to(bot, tenant.chat_id, message)
+    tenant.current_date = response.get('current_date')
+
+
+def bench(count: int, bot: telegram.Bot) -> dict:
+    """Прогоняем по одному циклу для `count` подписок."""
+    tenants = [Tenant(f'token{i}', i) for i in range(count)]
+    latencies = []
+    started = time.perf_counter()
+    for tenant in tenants:
+        cycle_started = time.perf_counter()
+        run_cycle(bot, tenant)
+        latencies.append(time.perf_counter() - cycle_started)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'tenants': count,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'polls_per_s': count / elapsed,
+        'bytes_per_tenant': measure_memory(count),
+    }
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--tenants', type=int, nargs='+', default=[1, 100, 1000, 10000]
+    )
+    args = parser.parse_args()
+    homework.logger.disabled = True
+    with StubServer() as server:
+        homework.ENDPOINT = f'{server.url}{STATUSES_PATH}'
+        homework.session = homework.create_session()
+        bot = telegram.Bot(token=BOT_TOKEN, base_url=f'{server.url}/bot')
+        print(f'{"tenants":>8} {"p50, мс":>9} {"p99, мс":>9} '
+              f'{"опрос/с":>9} {"байт/подп.":>11}')
+        for count in args.tenants:
+            result = bench(count, bot)
+            print(f'{result["tenants"]:>8} {result["p50_ms"]:>9.2f} '
+                  f'{result["p99_ms"]:>9.2f} {result["polls_per_s"]:>9.1f} '
+                  f'{result["bytes_per_tenant"]:>11.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Память на подписку: прежняя раскладка против `__slots__`.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_memory --tenants 10000 --homeworks 10
+"""
+import argparse
+import time
+import tracemalloc
+
+from tenants import Tenant, pack_homework
+
+DATE_UPDATED = 1581604857
+
+
+class LegacyTenant:
+    """Подписка до перехода на `__slots__`: словарь атрибутов и строки."""
+
+    def __init__(self, practicum_token, chat_id):
+        self.tenant_id = str(chat_id)
+        self.practicum_token = practicum_token
+        self.chat_id = chat_id
+        self.current_date = int(time.time())
+        self.seen = {}
+        self.message_error = ''
+        self.interval = 0
+        self.next_poll = time.monotonic()
+
+
+def legacy_tenant(index: int, homeworks: int) -> LegacyTenant:
+    """Подписка в прежнем виде с индексом работ из строк дат."""
+    tenant = LegacyTenant(f'token{index}', index)
+    for number in range(homeworks):
+        tenant.seen[str(number)] = time.strftime(
+            '%Y-%m-%dT%H:%M:%SZ', time.gmtime(DATE_UPDATED + index + number)
+        )
+    return tenant
+
+
+def compact_tenant(index: int, homeworks: int) -> Tenant:
+    """Подписка на `__slots__` с упакованным индексом работ."""
+    tenant = Tenant(f'token{index}', index)
+    for number in range(homeworks):
+        tenant.seen[str(number)] = pack_homework(
+            0, DATE_UPDATED + index + number
+        )
+    return tenant
+
+
+def bytes_per_tenant(factory, count: int, homeworks: int) -> float:
+    """Средний объём памяти на подписку по данным tracemalloc."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tenants = [factory(index, homeworks) for index in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(
+        stat.size_diff for stat in after.compare_to(before, 'filename')
+    )
+    del tenants
+    return size / count
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=10000)
+    parser.add_argument('--homeworks', type=int, default=10)
+    args = parser.parse_args()
+    before = bytes_per_tenant(legacy_tenant, args.tenants, args.homeworks)
+    after = bytes_per_tenant(compact_tenant, args.tenants, args.homeworks)
+    print(f'подписок: {args.tenants}, работ на подписку: {args.homeworks}')
+    print(f'до:    {before:>8.0f} байт/подписку')
+    print(f'после: {after:>8.0f} байт/подписку ({after / before:.0%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""Локальная замена API Практикум.Домашка и Telegram Bot API.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.stub_server --port 8080 --latency 0.05 \
+        --error-rate 0.05 --timeout-rate 0.01 --telegram-rate 30
+
+Бот направляется на заглушку переменными окружения:
+
+    PRACTICUM_ENDPOINT=http://127.0.0.1:8080/api/user_api/homework_statuses/
+    TELEGRAM_API_URL=http://127.0.0.1:8080
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from delivery import TokenBucket
+
+STATUSES_PATH = '/api/user_api/homework_statuses/'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Отвечает как API Практикум.Домашка и Telegram Bot API."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        """Не засоряем вывод журналом запросов."""
+
+    def _reply(self, status, payload, headers=None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _throttled(self, bucket) -> int:
+        """Сколько секунд клиенту ждать, если лимит исчерпан."""
+        if bucket is None:
+            return 0
+        with self.server.lock:
+            now = time.monotonic()
+            wait = bucket.wait_time(now)
+            if wait:
+                return max(1, round(wait))
+            bucket.consume(now)
+        return 0
+
+    def _failure(self):
+        """Разыгрываем сбой в соответствии с настройками заглушки."""
+        server = self.server
+        roll = random.random()
+        if roll < server.timeout_rate:
+            time.sleep(server.timeout_delay)
+            return HTTPStatus.REQUEST_TIMEOUT
+        if roll < server.timeout_rate + server.error_rate:
+            return HTTPStatus.INTERNAL_SERVER_ERROR
+        return None
+
+    def do_GET(self):
+        """Ответ в формате homework_statuses."""
+        if not self.path.startswith(STATUSES_PATH):
+            return self._reply(HTTPStatus.NOT_FOUND, {})
+        time.sleep(self.server.latency)
+        retry_after = self._throttled(self.server.practicum_bucket)
+        if retry_after:
+            return self._reply(
+                HTTPStatus.TOO_MANY_REQUESTS, {},
+                {'Retry-After': str(retry_after)}
+            )
+        status = self._failure()
+        if status is not None:
+            return self._reply(status, {'code': 'stub_error'})
+        with self.server.lock:
+            self.server.polls += 1
+            polls = self.server.polls
+        date_updated = time.strftime(
+            '%Y-%m-%dT%H:%M:%SZ', time.gmtime(polls)
+        )
+        self._reply(HTTPStatus.OK, {
+            'homeworks': [{
+                'id': 1,
+                'homework_name': 'hw123',
+                'status': 'approved',
+                'date_updated': date_updated,
+            }][:self.server.homeworks],
+            'current_date': int(time.time()),
+        })
+
+    def do_POST(self):
+        """Ответ в формате sendMessage."""
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if not self.path.endswith('/sendMessage'):
+            return self._reply(HTTPStatus.NOT_FOUND, {'ok': False})
+        time.sleep(self.server.latency)
+        retry_after = self._throttled(self.server.telegram_bucket)
+        if retry_after:
+            return self._reply(HTTPStatus.TOO_MANY_REQUESTS, {
+                'ok': False,
+                'error_code': HTTPStatus.TOO_MANY_REQUESTS,
+                'description': (
+                    f'Too Many Requests: retry after {retry_after}'
+                ),
+                'parameters': {'retry_after': retry_after},
+            })
+        with self.server.lock:
+            self.server.messages += 1
+            message_id = self.server.messages
+        self._reply(HTTPStatus.OK, {
+            'ok': True,
+            'result': {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': 1, 'type': 'private'},
+                'text': '',
+            },
+        })
+
+
+class StubServer(ThreadingHTTPServer):
+    """Локальный сервер-заглушка, работающий в фоновом потоке.
+
+    `latency` добавляется к каждому ответу, `error_rate` и
+    `timeout_rate` задают долю ответов 500 и 408 (последние приходят
+    через `timeout_delay` секунд). `practicum_rate` и `telegram_rate`
+    ограничивают число запросов в секунду ответом 429.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0,
+                 error_rate=0.0, timeout_rate=0.0, timeout_delay=0.0,
+                 practicum_rate=0, telegram_rate=0, homeworks=1):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.practicum_bucket = (
+            TokenBucket(practicum_rate, practicum_rate)
+            if practicum_rate else None
+        )
+        self.telegram_bucket = (
+            TokenBucket(telegram_rate, telegram_rate)
+            if telegram_rate else None
+        )
+        self.homeworks = homeworks
+        self.lock = threading.Lock()
+        self.polls = 0
+        self.messages = 0
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        """Базовый адрес заглушки."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self.thread = threading.Thread(
+            target=self.serve_forever, args=(0.05,), daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    """Запускаем заглушку из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-delay', type=float, default=30.0)
+    parser.add_argument('--practicum-rate', type=float, default=0)
+    parser.add_argument('--telegram-rate', type=float, default=0)
+    parser.add_argument('--homeworks', type=int, default=1)
+    args = parser.parse_args()
+    server = StubServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_delay=args.timeout_delay,
+        practicum_rate=args.practicum_rate,
+        telegram_rate=args.telegram_rate,
+        homeworks=args.homeworks,
+    )
+    print(f'Заглушка слушает {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Хранилище контрольных точек состояния подписок.
+
+    Записи копятся в памяти и сбрасываются на диск пачкой, когда их
+    набирается `sync_every` или с прошлого сброса прошло
+    `sync_interval` секунд; `sync_interval`, равный 0, не сбрасывает
+    по времени. Перед каждым сбросом вызывается `before_flush()`, если
+    он задан.
+    """
+
+    def __init__(self, sync_every=1, sync_interval=0.0, fsync=True):
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.fsync = fsync
+        self.pending = {}
+        self.last_flush = time.monotonic()
+        self.before_flush = None
+
+    def load(self) -> dict:
+        """Читаем сохранённые состояния подписок."""
+        raise NotImplementedError
+
+    def get(self, tenant_id: str):
+        """Сохранённое состояние одной подписки или None."""
+        return self.load().get(tenant_id)
+
+    def _write(self, states: dict) -> None:
+        raise NotImplementedError
+
+    def save(self, tenant_id: str, state: dict, key=None) -> None:
+        """Запоминаем состояние подписки и при необходимости сбрасываем.
+
+        `key` — ключ последнего сообщения, после которого получено
+        состояние; хранилище сохраняет состояние сразу и его не учитывает.
+        """
+        self.pending[tenant_id] = state
+        elapsed = time.monotonic() - self.last_flush
+        if (len(self.pending) >= self.sync_every
+                or 0 < self.sync_interval <= elapsed):
+            self.flush()
+
+    def flush(self) -> None:
+        """Записываем накопленные состояния на диск."""
+        if self.pending:
+            if self.before_flush is not None:
+                self.before_flush()
+            self._write(self.pending)
+            logger.debug('Сохранено контрольных точек: %d', len(self.pending))
+            self.pending = {}
+        self.last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Сбрасываем накопленное и освобождаем ресурсы."""
+        self.flush()
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Контрольные точки в базе SQLite."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'PRAGMA synchronous = ' + ('FULL' if self.fsync else 'NORMAL')
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoints '
+            '(tenant_id TEXT PRIMARY KEY, state TEXT NOT NULL)'
+        )
+        self.connection.commit()
+
+    def load(self) -> dict:
+        """Читаем сохранённые состояния подписок."""
+        rows = self.connection.execute(
+            'SELECT tenant_id, state FROM checkpoints'
+        )
+        return {tenant_id: json.loads(state) for tenant_id, state in rows}
+
+    def get(self, tenant_id: str):
+        """Сохранённое состояние одной подписки или None."""
+        row = self.connection.execute(
+            'SELECT state FROM checkpoints WHERE tenant_id = ?', (tenant_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, states: dict) -> None:
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO checkpoints VALUES (?, ?)',
+                [(tenant_id, json.dumps(state))
+                 for tenant_id, state in states.items()]
+            )
+
+    def close(self) -> None:
+        """Сбрасываем накопленное и закрываем базу."""
+        super().close()
+        self.connection.close()
+
+
+class FileCheckpointStore(CheckpointStore):
+    """Контрольные точки в файле, в который только дописываются строки.
+
+    При открытии файл сжимается до последнего состояния каждой подписки.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.states = self._read()
+        self._compact()
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def _read(self) -> dict:
+        states = {}
+        if not os.path.exists(self.path):
+            return states
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(
+                        'Пропущена повреждённая запись в %s', self.path
+                    )
+                    continue
+                states[record['id']] = record['state']
+        return states
+
+    def _compact(self) -> None:
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            for tenant_id, state in self.states.items():
+                file.write(json.dumps({'id': tenant_id, 'state': state}))
+                file.write('\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+
+    def load(self) -> dict:
+        """Читаем сохранённые состояния подписок."""
+        return dict(self.states)
+
+    def get(self, tenant_id: str):
+        """Сохранённое состояние одной подписки или None."""
+        return self.states.get(tenant_id)
+
+    def _write(self, states: dict) -> None:
+        for tenant_id, state in states.items():
+            self.file.write(json.dumps({'id': tenant_id, 'state': state}))
+            self.file.write('\n')
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        self.states.update(states)
+
+    def close(self) -> None:
+        """Сбрасываем накопленное и закрываем файл."""
+        super().close()
+        self.file.close()
+
+
+class SentCheckpoints:
+    """Контрольные точки, которые записываются только после отправки.
+
+    Без журнала исходящих контрольная точка не должна опережать
+    отправку: сообщения, ждущие в очереди, потерялись бы при
+    перезапуске. Состояние, сохранённое с ключом сообщения, ждёт, пока
+    очередь отправки подтвердит этот ключ в `mark_sent(keys)` из своего
+    потока. Подтверждённые состояния передаются в хранилище `store`
+    вызовом `apply()` в потоке опроса.
+    """
+
+    def __init__(self, store: CheckpointStore):
+        self.store = store
+        self.waiting = {}
+        self.ready = {}
+        self.lock = threading.Lock()
+
+    def load(self) -> dict:
+        """Читаем сохранённые состояния подписок."""
+        return self.store.load()
+
+    def get(self, tenant_id: str):
+        """Сохранённое состояние одной подписки или None."""
+        return self.store.get(tenant_id)
+
+    def save(self, tenant_id: str, state: dict, key=None) -> None:
+        """Откладываем состояние до отправки сообщения с ключом `key`."""
+        if key is None:
+            self.store.save(tenant_id, state)
+            return
+        with self.lock:
+            self.waiting[key] = (tenant_id, state)
+
+    def mark_sent(self, keys) -> None:
+        """Отмечаем сообщения отправленными."""
+        with self.lock:
+            for key in keys:
+                entry = self.waiting.pop(key, None)
+                if entry is not None:
+                    tenant_id, state = entry
+                    self.ready[tenant_id] = state
+
+    def apply(self) -> None:
+        """Передаём в хранилище состояния после отправленных сообщений."""
+        with self.lock:
+            ready, self.ready = self.ready, {}
+        for tenant_id, state in ready.items():
+            self.store.save(tenant_id, state)
+
+    def flush(self) -> None:
+        """Записываем подтверждённые состояния на диск."""
+        self.apply()
+        self.store.flush()
+
+
+BACKENDS = {
+    'sqlite': SQLiteCheckpointStore,
+    'file': FileCheckpointStore,
+}
+
+
+def create_checkpoint_store(backend: str, path: str,
+                            **kwargs) -> CheckpointStore:
+    """Создаём хранилище контрольных точек по имени бэкенда."""
+    try:
+        store_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f'Неизвестное хранилище контрольных точек: {backend}')
+    return store_class(path, **kwargs)
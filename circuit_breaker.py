@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Автомат защиты запросов к одному эндпоинту.
+
+    После `failure_threshold` сбоев подряд цепь размыкается, и запросы
+    не выполняются `reset_timeout` секунд. Затем цепь становится
+    полуразомкнутой: пропускаются не больше `probes` пробных запросов.
+    Успех пробы замыкает цепь, сбой снова размыкает её.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0,
+                 probes=1, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.lock = threading.Lock()
+        metrics.CIRCUIT_STATE.set(STATE_VALUES[CLOSED], name)
+
+    def _transition(self, state: str) -> None:
+        logger.warning('Цепь %s: %s -> %s', self.name, self.state, state)
+        self.state = state
+        self.probes_in_flight = 0
+        if state == OPEN:
+            self.opened_at = self.clock()
+        metrics.CIRCUIT_STATE.set(STATE_VALUES[state], self.name)
+
+    def allow(self) -> bool:
+        """Можно ли выполнить запрос сейчас."""
+        with self.lock:
+            if (self.state == OPEN
+                    and self.clock() - self.opened_at >= self.reset_timeout):
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and self.probes_in_flight < self.probes:
+                self.probes_in_flight += 1
+                return True
+            if self.state == CLOSED:
+                return True
+        metrics.CIRCUIT_REJECTED.inc(self.name)
+        return False
+
+    def retry_in(self) -> float:
+        """Через сколько секунд стоит повторить отклонённый запрос."""
+        with self.lock:
+            if self.state == OPEN:
+                return max(
+                    0.0, self.opened_at + self.reset_timeout - self.clock()
+                )
+            return self.reset_timeout
+
+    def record_success(self) -> None:
+        """Запрос дошёл до эндпоинта и получил рабочий ответ."""
+        with self.lock:
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        """Эндпоинт не ответил или ответил ошибкой сервера."""
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (
+                    self.state == CLOSED
+                    and self.failures >= self.failure_threshold):
+                self._transition(OPEN)
+
+
+BREAKERS = {}
+
+
+def breaker_for(endpoint: str, **kwargs) -> CircuitBreaker:
+    """Общий автомат защиты для эндпоинта."""
+    if endpoint not in BREAKERS:
+        BREAKERS[endpoint] = CircuitBreaker(endpoint, **kwargs)
+    return BREAKERS[endpoint]
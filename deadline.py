@@ -0,0 +1,35 @@
+import time
+
+from exceptions import DeadlineExceeded
+
+
+class Deadline:
+    """Срок, к которому должен завершиться цикл опроса.
+
+    Сетевые вызовы внутри цикла берут таймауты не больше оставшегося
+    времени, поэтому зависший запрос не держит цикл дольше срока.
+    """
+
+    def __init__(self, seconds: float, clock=time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        """Сколько секунд осталось до срока."""
+        return max(0.0, self.expires_at - self.clock())
+
+    @property
+    def expired(self) -> bool:
+        """Срок уже наступил."""
+        return self.clock() >= self.expires_at
+
+    def check(self, stage: str) -> None:
+        """Прерываем цикл, если срок наступил."""
+        if self.expired:
+            raise DeadlineExceeded(f'Цикл опроса не уложился в срок: {stage}')
+
+    def timeout(self, connect: float, read: float) -> tuple:
+        """Таймауты соединения и чтения, урезанные до оставшегося срока."""
+        self.check('перед запросом')
+        remaining = self.remaining()
+        return min(connect, remaining), min(read, remaining)
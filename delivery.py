@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LIMIT = 4096
+SEPARATOR = '\n\n'
+
+
+class TokenBucket:
+    """Ограничитель частоты: `rate` событий в секунду, запас `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now) -> None:
+        if now <= self.updated:
+            return
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait_time(self, now) -> float:
+        """Через сколько секунд появится свободный токен."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now) -> None:
+        """Забираем токен."""
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now) -> bool:
+        """Запас токенов восстановлен полностью."""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+def retry_after(error: Exception):
+    """Достаём из ошибки отправки паузу, которую просит Telegram."""
+    cause = error.__cause__ or error
+    return getattr(cause, 'retry_after', None)
+
+
+def is_permanent(error: Exception) -> bool:
+    """Ошибка отправки не пройдёт при повторе.
+
+    Например, чат не найден, бот заблокирован или токен отозван.
+    """
+    return getattr(error, 'permanent', False)
+
+
+def coalesce(messages: list) -> tuple:
+    """Склеиваем сообщения в одно, не превышая лимит Telegram.
+
+    Возвращает текст и число вошедших в него сообщений.
+    """
+    text = messages[0]
+    count = 1
+    for message in messages[1:]:
+        if len(text) + len(SEPARATOR) + len(message) > MESSAGE_LIMIT:
+            break
+        text = f'{text}{SEPARATOR}{message}'
+        count += 1
+    return text, count
+
+
+class DeliveryQueue:
+    """Очередь исходящих сообщений Telegram.
+
+    Сообщения в один чат объединяются, частота отправки ограничивается
+    для каждого чата и для бота в целом. Отправка идёт в отдельном
+    потоке и не задерживает опрос API.
+
+    Сообщения с ключом не теряются при сбое отправки: они повторяются
+    через `retry_delay` секунд, а после доставки их ключи передаются
+    в `on_sent(keys)`. Сообщения с постоянной ошибкой отправки
+    отбрасываются, и их ключи тоже передаются в `on_sent`.
+
+    С пулом потоков `executor` сообщения в разные чаты отправляются
+    параллельно; в один чат одновременно идёт не больше одной отправки,
+    поэтому порядок сообщений в чате сохраняется.
+    """
+
+    def __init__(self, send, chat_rate=1.0, global_rate=30.0,
+                 on_sent=None, retry_delay=30.0, executor=None):
+        self.send = send
+        self.executor = executor
+        self.sending = set()
+        self.on_sent = on_sent
+        self.retry_delay = retry_delay
+        self.chat_rate = chat_rate
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_buckets = {}
+        self.pending = OrderedDict()
+        self.not_before = {}
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = None
+
+    def put(self, chat_id, message: str, key=None) -> None:
+        """Ставим сообщение в очередь на отправку."""
+        with self.condition:
+            self.pending.setdefault(chat_id, []).append((message, key))
+            self.condition.notify()
+
+    def __len__(self):
+        with self.condition:
+            return sum(len(messages) for messages in self.pending.values())
+
+    def _chat_wait(self, chat_id, now) -> float:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+        return max(
+            bucket.wait_time(now), self.not_before.get(chat_id, 0) - now
+        )
+
+    def _deliver(self, chat_id, messages: list, now) -> None:
+        text, count = coalesce([message for message, _ in messages])
+        keys = [key for _, key in messages[:count] if key is not None]
+        try:
+            self.send(chat_id, text)
+        except Exception as error:
+            delay = retry_after(error)
+            if delay is None and (not keys or is_permanent(error)):
+                logger.error('Сообщение в чат %s не доставлено: %s',
+                             chat_id, error)
+                del messages[:count]
+                if keys and self.on_sent is not None:
+                    self.on_sent(keys)
+                return
+            if delay is None:
+                logger.error('Сообщение в чат %s не доставлено, повтор '
+                             'через %s с: %s',
+                             chat_id, self.retry_delay, error)
+                delay = self.retry_delay
+            else:
+                logger.warning('Telegram просит подождать %s с '
+                               'перед отправкой в чат %s', delay, chat_id)
+            self.not_before[chat_id] = now + delay
+            return
+        del messages[:count]
+        if keys and self.on_sent is not None:
+            self.on_sent(keys)
+
+    def drain_once(self) -> float:
+        """Отправляем всё, что позволяют лимиты.
+
+        Возвращает паузу до следующей возможной отправки.
+        """
+        wait = None
+        with self.condition:
+            chats = list(self.pending)
+        for chat_id in chats:
+            if chat_id in self.sending:
+                continue
+            now = time.monotonic()
+            delay = max(
+                self._chat_wait(chat_id, now),
+                self.global_bucket.wait_time(now)
+            )
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            with self.condition:
+                messages = self.pending.pop(chat_id)
+                self.sending.add(chat_id)
+            self.chat_buckets[chat_id].consume(now)
+            self.global_bucket.consume(now)
+            if self.executor is not None:
+                self.executor.submit(self._send_chat, chat_id, messages, now)
+                continue
+            self._send_chat(chat_id, messages, now)
+            if chat_id in self.pending:
+                wait = 0.0 if wait is None else wait
+        self._prune(time.monotonic())
+        return wait
+
+    def _send_chat(self, chat_id, messages: list, now) -> None:
+        try:
+            self._deliver(chat_id, messages, now)
+        finally:
+            with self.condition:
+                self.sending.discard(chat_id)
+                if messages:
+                    self.pending.setdefault(chat_id, [])[:0] = messages
+                self.condition.notify()
+
+    def _prune(self, now) -> None:
+        for chat_id in list(self.chat_buckets):
+            if (chat_id not in self.pending and chat_id not in self.sending
+                    and self.chat_buckets[chat_id].is_full(now)):
+                del self.chat_buckets[chat_id]
+                self.not_before.pop(chat_id, None)
+
+    def run(self) -> None:
+        """Цикл отправки сообщений из очереди."""
+        while not self.stopped:
+            wait = self.drain_once()
+            with self.condition:
+                if self.stopped:
+                    break
+                if wait is None and not self.pending.keys() - self.sending:
+                    self.condition.wait()
+                elif wait:
+                    self.condition.wait(wait)
+
+    def start(self) -> None:
+        """Запускаем фоновый поток отправки."""
+        self.thread = threading.Thread(
+            target=self.run, name='delivery', daemon=True
+        )
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Останавливаем фоновый поток отправки."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
@@ -0,0 +1,47 @@
+import hashlib
+import re
+import time
+
+VOLATILE = re.compile(r'0x[0-9a-f]+|\d+', re.IGNORECASE)
+
+
+def normalize(text: str) -> str:
+    """Убираем из текста ошибки числа, адреса и лишние пробелы.
+
+    Так отметки времени, порты и идентификаторы не делают одну и ту же
+    ошибку непохожей на себя.
+    """
+    return ' '.join(VOLATILE.sub('#', text).split())
+
+
+def error_fingerprint(error: Exception) -> int:
+    """Отпечаток ошибки: класс исключения и нормализованный текст."""
+    key = f'{type(error).__name__}:{normalize(str(error))}'
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class ErrorDeduplicator:
+    """Решает, сообщать ли пользователю об ошибке.
+
+    Об ошибке с тем же отпечатком повторно сообщается не раньше, чем
+    через `window` секунд. Для подписки хранится не больше `max_errors`
+    отпечатков, самые старые вытесняются.
+    """
+
+    def __init__(self, window=3600.0, max_errors=8):
+        self.window = window
+        self.max_errors = max_errors
+
+    def should_notify(self, errors: dict, error: Exception,
+                      now=None) -> bool:
+        """Проверяем ошибку и запоминаем её отпечаток в `errors`."""
+        now = time.monotonic() if now is None else now
+        key = error_fingerprint(error)
+        last = errors.get(key)
+        if last is not None and now - last < self.window:
+            return False
+        errors[key] = now
+        while len(errors) > self.max_errors:
+            del errors[min(errors, key=errors.get)]
+        return True
@@ -1,7 +1,8 @@
 class UnavailabilityEndpoint(Exception):
     """Статус-код ответа API не 200."""
 
-    def __init__(self, *args):
+    def __init__(self, *args, status_code=None):
+        self.status_code = status_code
         if args:
             self.message = args[0]
         else:
@@ -59,9 +60,13 @@ class ObjectNotInstance(Exception):
 
 
 class SendMessageTelegramError(Exception):
-    """Ошибка при отправке сообщения в Telegram чат."""
+    """Ошибка при отправке сообщения в Telegram чат.
 
-    def __init__(self, *args):
+    `permanent` отмечает ошибки, которые не пройдут при повторе.
+    """
+
+    def __init__(self, *args, permanent=False):
+        self.permanent = permanent
         if args:
             self.message = args[0]
         else:
@@ -71,3 +76,18 @@ class SendMessageTelegramError(Exception):
         if self.message:
             return f'SendMessageTelegramError, {self.message}'
         return 'Ошибка при отправке сообщения в телеграм-чат'
+
+
+class DeadlineExceeded(Exception):
+    """Цикл опроса не уложился в отведённый срок."""
+
+    def __init__(self, *args):
+        if args:
+            self.message = args[0]
+        else:
+            self.message = None
+
+    def __str__(self):
+        if self.message:
+            return f'DeadlineExceeded, {self.message}'
+        return 'Цикл опроса не уложился в отведённый срок'
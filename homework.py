@@ -1,30 +1,146 @@
+import argparse
 import logging
 import os
+import socket
 import sys
 import time
 from http import HTTPStatus
-
-import requests
-import telegram
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING
 
 from exceptions import (UnavailabilityEndpoint,
                         RequestFailureEndpoint,
-                        ErrorValueDictionary,
+                        DeadlineExceeded,
                         ObjectNotInstance,
                         SendMessageTelegramError
                         )
+import metrics
+from circuit_breaker import breaker_for
+from checkpoints import BACKENDS as CHECKPOINT_BACKENDS
+from checkpoints import SentCheckpoints, create_checkpoint_store
+from log_config import configure_logging
+from outbox import Outbox, message_key
+from poll_pool import PollPool
+from response_cache import ResponseCache, fingerprint
+from schema import HomeworkValidator, decode_response
+from deadline import Deadline
+from delivery import DeliveryQueue
+from error_dedup import ErrorDeduplicator
+from leases import BACKENDS as LEASE_BACKENDS
+from leases import create_lease_store
+from scheduler import REVIEWING, AdaptiveSchedule, PollQueue, spread_polls
+from sharding import run_sharded, select_shard
+from templates import TemplateRegistry
+from tenants import Tenant, load_tenants, pack_homework, unpack_homework
+from webhook import (Inbox, WebhookServer, INSECURE_HOST_MESSAGE,
+                     is_insecure)
+
+if TYPE_CHECKING:
+    import requests
+    import telegram
+
+ENV_FILE = '.env'
+
+
+def load_env_file() -> None:
+    """Загружаем переменные окружения из `.env`, если файл есть.
+
+    Файл ищется в текущем каталоге и рядом с модулем; без него
+    python-dotenv не импортируется.
+    """
+    for directory in (os.getcwd(), os.path.dirname(os.path.abspath(__file__))):
+        path = os.path.join(directory, ENV_FILE)
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+            return
 
-load_dotenv()
+
+load_env_file()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+ASYNC_MODE = os.getenv('ASYNC_MODE', '').lower() in ('1', 'true', 'yes')
+ASYNC_CONCURRENCY = int(os.getenv('ASYNC_CONCURRENCY', 100))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 3))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', 0.5))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+CYCLE_DEADLINE = float(os.getenv('CYCLE_DEADLINE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+METRICS_PORT = os.getenv('METRICS_PORT')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG').upper()
+LOG_JSON = os.getenv('LOG_FORMAT', 'text').lower() == 'json'
+CHECKPOINT_BACKEND = os.getenv('CHECKPOINT_BACKEND')
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'checkpoints.db')
+CHECKPOINT_SYNC_EVERY = int(os.getenv('CHECKPOINT_SYNC_EVERY', 1))
+CHECKPOINT_SYNC_INTERVAL = float(os.getenv('CHECKPOINT_SYNC_INTERVAL', 0))
+ERROR_SILENCE_WINDOW = float(os.getenv('ERROR_SILENCE_WINDOW', 3600))
+ERROR_MEMORY = int(os.getenv('ERROR_MEMORY', 8))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', 30))
+CIRCUIT_PROBES = int(os.getenv('CIRCUIT_PROBES', 1))
+LEASE_BACKEND = os.getenv('LEASE_BACKEND')
+REPLICA_ID = os.getenv('REPLICA_ID') or socket.gethostname()
+LEASE_PATH = os.getenv('LEASE_PATH', 'leases.db')
+LEASE_TTL = float(os.getenv('LEASE_TTL', 30))
+WEBHOOK_PORT = os.getenv('WEBHOOK_PORT')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '127.0.0.1')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+RECONCILE_INTERVAL = int(os.getenv('RECONCILE_INTERVAL', 3600))
+OUTBOX_PATH = os.getenv('OUTBOX_PATH')
+SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', 1))
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 1))
+SHARD_INDEX = int(os.getenv('SHARD_INDEX', 0))
+POLL_THREADS = int(os.getenv('POLL_THREADS', 1))
+SEND_THREADS = int(os.getenv('SEND_THREADS', 1))
+POLL_QUEUE_SIZE = int(os.getenv('POLL_QUEUE_SIZE', 0))
+STARTUP_SPREAD = float(os.getenv('STARTUP_SPREAD', 60))
 
 RETRY_TIME = 600
+MIN_RETRY_TIME = int(os.getenv('MIN_RETRY_TIME', 60))
+MAX_RETRY_TIME = int(os.getenv('MAX_RETRY_TIME', 3600))
+RETRY_JITTER = float(os.getenv('RETRY_JITTER', 0.1))
+IDLE_WAIT = 1.0
+
+SHARED_CHECKPOINT_MESSAGE = (
+    'Аренда подписок требует общего хранилища контрольных точек: '
+    'CHECKPOINT_BACKEND=file не подходит для нескольких реплик'
+)
+SHARDED_CHECKPOINT_MESSAGE = (
+    'SHARD_WORKERS > 1 требует общего хранилища контрольных точек: '
+    'CHECKPOINT_BACKEND=file не подходит для нескольких процессов'
+)
+ASYNC_OUTBOX_MESSAGE = (
+    'OUTBOX_PATH не поддерживается с ASYNC_MODE: журнал исходящих '
+    'ведётся только в синхронном режиме'
+)
+SHARDED_METRICS_MESSAGE = (
+    'METRICS_PORT не поддерживается с SHARD_WORKERS > 1: метрики '
+    'процессов-воркеров не собираются'
+)
 
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+ENDPOINT = os.getenv(
+    'PRACTICUM_ENDPOINT',
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+)
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+RETRY_STATUSES = (
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+)
+
+session = None
+deadline_session = None
+response_cache = ResponseCache()
+schedule = AdaptiveSchedule(
+    MIN_RETRY_TIME, MAX_RETRY_TIME, RETRY_TIME, RETRY_JITTER
+)
 
 VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -32,58 +148,185 @@ VERDICTS = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+STATUSES = tuple(VERDICTS)
+
+DEFAULT_LOCALE = 'ru'
+MESSAGE_TEMPLATE = (
+    'Изменился статус проверки работы "{homework_name}". {verdict}'
+)
+EN_MESSAGE_TEMPLATE = (
+    'Review status of homework "{homework_name}" has changed. {verdict}'
+)
+EN_VERDICTS = {
+    'approved': 'The reviewer liked everything. Hooray!',
+    'reviewing': 'The reviewer has started checking the homework.',
+    'rejected': 'The reviewer left some comments.'
+}
+TEMPLATES_FILE = os.getenv('TEMPLATES_FILE')
+RECOVERED_MESSAGE = 'Работа программы восстановлена'
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-formatter = logging.Formatter(
-    '%(asctime)s - %(levelname)s - %(message)s'
+validator = HomeworkValidator(STATUSES)
+api_breaker = breaker_for(
+    ENDPOINT,
+    failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=CIRCUIT_RESET_TIMEOUT,
+    probes=CIRCUIT_PROBES,
 )
-handler = logging.StreamHandler(stream=sys.stdout)
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+deduplicator = ErrorDeduplicator(ERROR_SILENCE_WINDOW, ERROR_MEMORY)
+templates = TemplateRegistry(DEFAULT_LOCALE)
+templates.add_locale(DEFAULT_LOCALE, MESSAGE_TEMPLATE, VERDICTS)
+templates.add_locale('en', EN_MESSAGE_TEMPLATE, EN_VERDICTS)
+
 
+def create_session(pool_size: int = HTTP_POOL_SIZE,
+                   retries: int = HTTP_RETRIES,
+                   backoff_factor: float = HTTP_BACKOFF_FACTOR
+                   ) -> 'requests.Session':
+    """Создаём HTTP-сессию с keep-alive, пулом соединений и повторами."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 
-def send_message(bot: telegram.Bot, message: str) -> None:
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+    http_session = requests.Session()
+    http_session.mount('https://', adapter)
+    http_session.mount('http://', adapter)
+    return http_session
+
+
+def send_message(bot: 'telegram.Bot', message: str) -> None:
     """Отправляем сообщение в Telegram чат."""
+    send_message_to(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_message_to(bot: 'telegram.Bot', chat_id, message: str) -> None:
+    """Отправляем сообщение в указанный Telegram чат."""
+    import telegram
+
+    started = time.monotonic()
     try:
-        logger.debug(
-            f'Начинаем отправлять сообщение {message}'
-        )
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-    except telegram.TelegramError:
+        logger.debug('Начинаем отправлять сообщение %s', message)
+        bot.send_message(chat_id, message, timeout=HTTP_READ_TIMEOUT)
+    except telegram.TelegramError as error:
+        metrics.TELEGRAM_FAILURES.inc()
         raise SendMessageTelegramError(
-            f'Ошибка при отправке сообщения {message} в Telegram чат'
-        )
+            f'Ошибка при отправке сообщения {message} в Telegram чат',
+            permanent=isinstance(error, (
+                telegram.error.Unauthorized,
+                telegram.error.BadRequest,
+                telegram.error.ChatMigrated,
+            ))
+        ) from error
     else:
-        logger.info(
-            f'В чат успешно отправлено сообщение {message}.'
-        )
+        metrics.MESSAGES_SENT.inc()
+        logger.info('В чат успешно отправлено сообщение %s.', message)
+    finally:
+        metrics.TELEGRAM_LATENCY.observe(time.monotonic() - started)
 
 
 def get_api_answer(current_timestamp: int) -> dict:
     """Делаем запрос к эндпоинту API-сервиса Практикум.Домашка."""
+    return request_homework_statuses(HEADERS, current_timestamp)
+
+
+def request_homework_statuses(headers: dict, current_timestamp: int) -> dict:
+    """Запрашиваем статусы домашних работ с заданными заголовками."""
+    return decode_response(fetch_homework_statuses(headers, current_timestamp))
+
+
+def http_client(deadline: Deadline = None):
+    """HTTP-сессия или модуль requests, пока сессия не создана.
+
+    Запросам со сроком отдаётся сессия без повторов: их повторяет
+    `fetch_homework_statuses`, не выходя за срок.
+    """
+    client = session if deadline is None else deadline_session
+    if client is not None:
+        return client
+    import requests
+    return requests
+
+
+def is_retryable(error: Exception) -> bool:
+    """Стоит ли повторить запрос после ошибки."""
+    if isinstance(error, UnavailabilityEndpoint):
+        return error.status_code in RETRY_STATUSES
+    return isinstance(error, RequestFailureEndpoint)
+
+
+def fetch_homework_statuses(headers: dict, current_timestamp: int,
+                            deadline: Deadline = None):
+    """Запрашиваем статусы и возвращаем ответ без разбора тела.
+
+    Кроме 200 допускается 304 на условный запрос. Со сроком `deadline`
+    таймауты запроса урезаются до оставшегося времени, а сбои
+    повторяются до `HTTP_RETRIES` раз, только пока пауза перед
+    повтором укладывается в срок.
+    """
     timestamp = current_timestamp or int(time.time())
     params = {'from_date': timestamp}
+    if deadline is None:
+        return request_statuses(headers, params)
+    for attempt in range(HTTP_RETRIES + 1):
+        try:
+            return request_statuses(headers, params, deadline)
+        except (RequestFailureEndpoint, UnavailabilityEndpoint) as error:
+            pause = HTTP_BACKOFF_FACTOR * 2 ** attempt
+            if (attempt == HTTP_RETRIES or not is_retryable(error)
+                    or pause >= deadline.remaining()):
+                raise
+            logger.warning('Повторяем запрос через %.1f с: %s', pause, error)
+            time.sleep(pause)
+
+
+def request_statuses(headers: dict, params: dict, deadline: Deadline = None):
+    """Один запрос статусов к API без повторов на уровне бота."""
+    timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    if deadline is not None:
+        timeout = deadline.timeout(*timeout)
+    started = time.monotonic()
     try:
         logger.info('Отправляем запрос к API Практикум.Домашка')
-        response = requests.get(
+        response = http_client(deadline).get(
             ENDPOINT,
-            headers=HEADERS,
-            params=params
+            headers=headers,
+            params=params,
+            timeout=timeout
         )
     except Exception as error:
+        metrics.API_RESPONSES.inc('error')
+        if deadline is not None:
+            deadline.check('запрос к API')
         raise RequestFailureEndpoint(
             f'Сбой при запросе к эндпоинту: {error}'
-            f'Параметры запроса {ENDPOINT}, {HEADERS}, {params}'
+            f'Параметры запроса {ENDPOINT}, {headers}, {params}'
         )
     else:
-        if response.status_code != HTTPStatus.OK:
+        metrics.API_RESPONSES.inc(int(response.status_code))
+        if response.status_code not in (HTTPStatus.OK,
+                                        HTTPStatus.NOT_MODIFIED):
             raise UnavailabilityEndpoint(
                 'Эндпоинт недоступен. '
                 f'Статус-код ответа API: {response.status_code}'
                 f'{response.text}'
-                f'Параметры запроса: {ENDPOINT}, {HEADERS}, {params}'
+                f'Параметры запроса: {ENDPOINT}, {headers}, {params}',
+                status_code=response.status_code
             )
-    return response.json()
+    finally:
+        metrics.API_LATENCY.observe(time.monotonic() - started)
+    return response
 
 
 def check_response(response: dict) -> list:
@@ -114,59 +357,692 @@ def parse_status(homework: dict) -> str:
         raise KeyError(
             'Ошибка получения значения по ключу в словаре'
         )
-    try:
-        verdict = VERDICTS[homework_status]
-    except KeyError as error:
-        raise ErrorValueDictionary(
-            f'Недокументированный статус домашней работы: {error}'
-        )
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    return status_message(homework_name, homework_status)
+
+
+def status_message(homework_name: str, homework_status: str,
+                   locale: str = None) -> str:
+    """Формируем сообщение о статусе проверки работы."""
+    return templates.render(homework_name, homework_status, locale)
 
 
 def check_tokens() -> bool:
     """Проверяем доступность переменных окружения."""
-    tokens = (PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
+    if TENANTS_FILE:
+        tokens = (TELEGRAM_TOKEN,)
+    else:
+        tokens = (PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
     for token in tokens:
         if not token:
-            logger.critical(f'Отсутствует {token}')
+            logger.critical('Отсутствует %s', token)
     return all(tokens)
 
 
-def main() -> None:
+def check_files() -> list:
+    """Проверяем, что файлы подписок и шаблонов читаются."""
+    errors = []
+    if TENANTS_FILE:
+        try:
+            load_tenants(TENANTS_FILE)
+        except Exception as error:
+            errors.append(f'Файл подписок {TENANTS_FILE}: {error!r}')
+    if TEMPLATES_FILE:
+        try:
+            TemplateRegistry(DEFAULT_LOCALE).load(TEMPLATES_FILE)
+        except Exception as error:
+            errors.append(f'Файл шаблонов {TEMPLATES_FILE}: {error!r}')
+    return errors
+
+
+def check_config() -> list:
+    """Проверяем настройки без обращения к сети.
+
+    Возвращает список найденных ошибок.
+    """
+    checks = (
+        (not check_tokens(), 'Не заданы обязательные переменные окружения'),
+        (CHECKPOINT_BACKEND
+         and CHECKPOINT_BACKEND not in CHECKPOINT_BACKENDS,
+         f'Неизвестный CHECKPOINT_BACKEND: {CHECKPOINT_BACKEND}'),
+        (LEASE_BACKEND and LEASE_BACKEND not in LEASE_BACKENDS,
+         f'Неизвестный LEASE_BACKEND: {LEASE_BACKEND}'),
+        (LEASE_BACKEND and CHECKPOINT_BACKEND == 'file',
+         SHARED_CHECKPOINT_MESSAGE),
+        (not 0 <= SHARD_INDEX < SHARD_COUNT,
+         f'SHARD_INDEX {SHARD_INDEX} вне диапазона SHARD_COUNT '
+         f'{SHARD_COUNT}'),
+        (min(SHARD_WORKERS, POLL_THREADS, SEND_THREADS) < 1,
+         'SHARD_WORKERS, POLL_THREADS и SEND_THREADS должны быть не '
+         'меньше 1'),
+        (WEBHOOK_PORT and not WEBHOOK_PORT.isdigit(),
+         f'WEBHOOK_PORT не число: {WEBHOOK_PORT}'),
+        (WEBHOOK_PORT and is_insecure(WEBHOOK_HOST, WEBHOOK_SECRET),
+         INSECURE_HOST_MESSAGE),
+        (METRICS_PORT and not METRICS_PORT.isdigit(),
+         f'METRICS_PORT не число: {METRICS_PORT}'),
+    )
+    return ([message for failed, message in checks if failed]
+            + mode_errors() + check_files())
+
+
+def mode_errors() -> list:
+    """Настройки, несовместимые с выбранным режимом работы.
+
+    С такими настройками бот не запускается.
+    """
+    sharded = SHARD_WORKERS > 1
+    checks = (
+        (sharded and CHECKPOINT_BACKEND == 'file',
+         SHARDED_CHECKPOINT_MESSAGE),
+        (sharded and METRICS_PORT, SHARDED_METRICS_MESSAGE),
+        (ASYNC_MODE and OUTBOX_PATH, ASYNC_OUTBOX_MESSAGE),
+    )
+    return [message for failed, message in checks if failed]
+
+
+def get_tenants() -> list:
+    """Получаем список подписок для опроса."""
+    if TENANTS_FILE:
+        tenants = load_tenants(TENANTS_FILE)
+    else:
+        tenants = [Tenant(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)]
+    if SHARD_COUNT > 1:
+        tenants = select_shard(tenants, SHARD_INDEX, SHARD_COUNT)
+    return tenants
+
+
+def diff_homeworks(tenant: Tenant, records: list) -> list:
+    """Отбираем работы с датой обновления новее известной.
+
+    Дата обновления служит версией работы: запоздавшее или пришедшее
+    не по порядку событие со старой датой не откатывает статус. API
+    отдаёт работы от новых к старым, поэтому изменения возвращаются
+    в хронологическом порядке.
+    """
+    versions = {}
+    changed = []
+    for record in reversed(records):
+        version = versions.get(record.key)
+        if version is None:
+            known = tenant.seen.get(record.key)
+            version = -1 if known is None else unpack_homework(known)[1]
+        if record.date_updated > version:
+            versions[record.key] = record.date_updated
+            changed.append(record)
+    return changed
+
+
+def collect_updates(tenant: Tenant, response: dict) -> list:
+    """Проверяем ответ API и собираем сообщения о новых статусах."""
+    return [message for _, message in collect_events(tenant, response)]
+
+
+def collect_events(tenant: Tenant, response: dict) -> list:
+    """Собираем сообщения о новых статусах с ключами идемпотентности."""
+    try:
+        records = validator.validate(response)
+    except Exception as error:
+        metrics.CHECK_FAILURES.inc(type(error).__name__)
+        raise
+    if len(records) < 1:
+        logger.debug('Новых изменений не обнаружено')
+        return []
+    changed = diff_homeworks(tenant, records)
+    if not changed:
+        logger.debug('Новых статусов не обнаружено')
+        return []
+    events = [
+        (message_key(tenant.tenant_id, record.key, record.date_updated),
+         status_message(record.name, STATUSES[record.status], tenant.locale))
+        for record in changed
+    ]
+    for record in changed:
+        tenant.seen[record.key] = pack_homework(
+            record.status, record.date_updated
+        )
+    return events
+
+
+def error_message(tenant: Tenant, error: Exception):
+    """Формируем сообщение о сбое, если о нём ещё не сообщали.
+
+    Повтор той же ошибки подавляется на `ERROR_SILENCE_WINDOW` секунд,
+    в том числе после успешных опросов между сбоями.
+    """
+    message = f'Сбой в работе программы: {error}'
+    logger.error(message, exc_info=True)
+    if tenant.errors is None:
+        tenant.errors = {}
+    if not deduplicator.should_notify(tenant.errors, error):
+        return None
+    tenant.outage = True
+    return message
+
+
+def recovery_message(tenant: Tenant):
+    """Сообщение о восстановлении после сбоя, о котором сообщили.
+
+    Отпечатки ошибок сохраняются, поэтому чередование сбоя с успешными
+    опросами не повторяет ни сообщение о сбое, ни о восстановлении.
+    """
+    if not tenant.outage:
+        return None
+    tenant.outage = False
+    logger.info('%s: работа восстановлена', tenant)
+    return RECOVERED_MESSAGE
+
+
+def get_checkpoint_store():
+    """Создаём хранилище контрольных точек, если оно настроено."""
+    if not CHECKPOINT_BACKEND:
+        return None
+    return create_checkpoint_store(
+        CHECKPOINT_BACKEND,
+        CHECKPOINT_PATH,
+        sync_every=CHECKPOINT_SYNC_EVERY,
+        sync_interval=CHECKPOINT_SYNC_INTERVAL,
+    )
+
+
+def get_outbox(name=None):
+    """Открываем журнал исходящих сообщений, если он настроен.
+
+    У каждого процесса-воркера свой файл журнала с суффиксом `name`, а
+    у каждой реплики с арендой подписок — с суффиксом `REPLICA_ID`.
+    """
+    if not OUTBOX_PATH:
+        return None
+    suffixes = [REPLICA_ID if LEASE_BACKEND else None, name]
+    return Outbox('.'.join(
+        [OUTBOX_PATH] + [suffix for suffix in suffixes if suffix]
+    ))
+
+
+def get_lease_store():
+    """Создаём хранилище аренд подписок, если оно настроено."""
+    if not LEASE_BACKEND:
+        return None
+    if CHECKPOINT_BACKEND == 'file':
+        raise ValueError(SHARED_CHECKPOINT_MESSAGE)
+    return create_lease_store(LEASE_BACKEND, LEASE_PATH, ttl=LEASE_TTL)
+
+
+def claim_tenant(tenant: Tenant, leases, checkpoints=None) -> bool:
+    """Проверяем, что подписку сейчас опрашивает эта реплика.
+
+    Без аренды подписка откладывается на `ttl`. Подписку, перешедшую
+    от другой реплики, подтягиваем из контрольных точек, чтобы не
+    повторять уже отправленные уведомления.
+    """
+    if leases is None:
+        return True
+    held = tenant.tenant_id in leases.held
+    if not leases.acquire(tenant.tenant_id):
+        tenant.next_poll = time.monotonic() + leases.ttl
+        return False
+    if not held:
+        logger.info('Реплика взяла подписку %s', tenant)
+        response_cache.forget(tenant.tenant_id)
+        state = checkpoints and checkpoints.get(tenant.tenant_id)
+        if state:
+            tenant.restore(state, STATUSES)
+    return True
+
+
+def restore_tenants(tenants: list, checkpoints) -> None:
+    """Восстанавливаем состояние подписок из контрольных точек."""
+    states = checkpoints.load()
+    for tenant in tenants:
+        state = states.get(tenant.tenant_id)
+        if state is not None:
+            tenant.restore(state, STATUSES)
+    logger.info('Восстановлено контрольных точек: %d', len(states))
+
+
+def reschedule(tenant: Tenant, homeworks) -> None:
+    """Назначаем время следующего опроса подписки.
+
+    Пока одна из работ подписки на проверке, опрос не замедляется.
+    """
+    tenant.interval = schedule.next_interval(
+        tenant.interval, homeworks,
+        tenant.has_status(STATUSES.index(REVIEWING))
+    )
+    tenant.next_poll = time.monotonic() + schedule.delay(tenant.interval)
+
+
+def process_response(notify, tenant: Tenant, response: dict,
+                     checkpoints=None) -> None:
+    """Разбираем ответ API и отправляем сообщения о новых статусах."""
+    messages = collect_events(tenant, response)
+    for key, message in messages:
+        notify(tenant.chat_id, message, key)
+    tenant.current_date = response.get('current_date')
+    if messages and checkpoints is not None:
+        checkpoints.save(
+            tenant.tenant_id, tenant.checkpoint(STATUSES), messages[-1][0]
+        )
+    reschedule(tenant, response['homeworks'])
+
+
+def is_outage(error: Exception) -> bool:
+    """Говорит ли ошибка о сбое самого API, а не одной подписки."""
+    if isinstance(error, (RequestFailureEndpoint, DeadlineExceeded)):
+        return True
+    if isinstance(error, UnavailabilityEndpoint):
+        status = error.status_code
+        return (status is None or status >= HTTPStatus.INTERNAL_SERVER_ERROR
+                or status == HTTPStatus.TOO_MANY_REQUESTS)
+    return False
+
+
+def record_outcome(error=None) -> None:
+    """Сообщаем автомату защиты API результат запроса."""
+    if error is not None and is_outage(error):
+        api_breaker.record_failure()
+    else:
+        api_breaker.record_success()
+
+
+def short_circuit(tenant: Tenant) -> bool:
+    """Откладываем опрос подписки, пока цепь API разомкнута."""
+    if api_breaker.allow():
+        return False
+    tenant.next_poll = time.monotonic() + schedule.delay(
+        api_breaker.retry_in()
+    )
+    return True
+
+
+def guarded_fetch(headers: dict, current_timestamp: int,
+                  deadline: Deadline = None):
+    """Запрашиваем статусы и отмечаем результат в автомате защиты."""
+    try:
+        response = fetch_homework_statuses(
+            headers, current_timestamp, deadline
+        )
+    except Exception as error:
+        record_outcome(error)
+        raise
+    record_outcome()
+    return response
+
+
+def ingest_events(notify, tenants: list, events: list,
+                  checkpoints=None) -> None:
+    """Отправляем сообщения по событиям, принятым приёмником.
+
+    Уже отправленные изменения отсеиваются так же, как при опросе,
+    поэтому сверка опросом их не повторит. Событие без идентификатора
+    относится к единственной подписке.
+    """
+    if not events:
+        return
+    by_id = {tenant.tenant_id: tenant for tenant in tenants}
+    if len(tenants) == 1:
+        by_id[None] = tenants[0]
+    for tenant_id, homeworks in events:
+        tenant = by_id.get(tenant_id)
+        if tenant is None:
+            logger.warning('Событие для неизвестной подписки %s', tenant_id)
+            metrics.WEBHOOK_EVENTS.inc('unknown')
+            continue
+        try:
+            messages = collect_events(tenant, {
+                'homeworks': homeworks, 'current_date': tenant.current_date
+            })
+        except Exception as error:
+            logger.error('Некорректное событие для %s: %s', tenant, error)
+            metrics.WEBHOOK_EVENTS.inc('invalid')
+            continue
+        metrics.WEBHOOK_EVENTS.inc('accepted')
+        for key, message in messages:
+            notify(tenant.chat_id, message, key)
+        if messages and checkpoints is not None:
+            checkpoints.save(
+                tenant.tenant_id, tenant.checkpoint(STATUSES),
+                messages[-1][0]
+            )
+
+
+def poll_request(tenant: Tenant) -> tuple:
+    """Заголовки и дата запроса статусов для подписки."""
+    return (
+        {**tenant.headers,
+         **response_cache.conditional_headers(tenant.tenant_id)},
+        tenant.current_date,
+    )
+
+
+def timed_fetch(headers: dict, current_timestamp: int) -> tuple:
+    """Запрашиваем статусы в пределах срока цикла опроса.
+
+    Возвращает ответ и срок `Deadline`, чтобы проверить его перед
+    разбором ответа.
+    """
+    deadline = Deadline(CYCLE_DEADLINE)
+    return guarded_fetch(headers, current_timestamp, deadline), deadline
+
+
+def poll_tenant(notify, tenant: Tenant, checkpoints=None) -> None:
+    """Выполняем один цикл опроса API для подписки.
+
+    Сообщения передаются в `notify(chat_id, message)`. Пока цепь API
+    разомкнута, опрос откладывается без запроса. Цикл, не уложившийся
+    в `CYCLE_DEADLINE` секунд, прерывается.
+    """
+    if short_circuit(tenant):
+        return
+    complete_poll(
+        notify, tenant, lambda: timed_fetch(*poll_request(tenant)),
+        checkpoints
+    )
+
+
+def complete_poll(notify, tenant: Tenant, fetch, checkpoints=None) -> None:
+    """Разбираем результат запроса `fetch()` и сообщаем о сбоях.
+
+    `fetch()` возвращает ответ API и срок цикла опроса.
+    """
+    try:
+        response, deadline = fetch()
+        deadline.check('разбор ответа')
+        handle_response(notify, tenant, response, checkpoints)
+        message = recovery_message(tenant)
+
+    except Exception as error:
+        if isinstance(error, DeadlineExceeded):
+            metrics.CYCLE_OVERRUNS.inc()
+        reschedule(tenant, None)
+        message = error_message(tenant, error)
+    if message is not None:
+        notify(tenant.chat_id, message)
+
+
+def handle_response(notify, tenant: Tenant, response,
+                    checkpoints=None) -> None:
+    """Разбираем ответ API, если он изменился с прошлого опроса."""
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        logger.debug('Ответ API не изменился')
+        reschedule(tenant, [])
+        return
+    digest, current_date = fingerprint(response.content)
+    if response_cache.is_unchanged(tenant.tenant_id, digest):
+        logger.debug('Ответ API не изменился')
+        tenant.current_date = current_date or tenant.current_date
+        reschedule(tenant, [])
+        return
+    process_response(notify, tenant, decode_response(response), checkpoints)
+    response_cache.remember(tenant.tenant_id, response.headers, digest)
+
+
+def main(argv=None) -> None:
     """Основная логика работы бота."""
+    parser = argparse.ArgumentParser(
+        description='Telegram-бот статусов Практикум.Домашка'
+    )
+    parser.add_argument(
+        '--check', action='store_true',
+        help='проверить настройки без запуска бота и выйти'
+    )
+    args = parser.parse_args(argv)
+    listener = configure_logging(LOG_LEVEL, LOG_JSON)
+    try:
+        if args.check:
+            run_check()
+        else:
+            run()
+    finally:
+        listener.stop()
+
+
+def run_check() -> None:
+    """Проверяем настройки и завершаемся с ошибкой, если они неверны.
+
+    Telegram-бот не создаётся, запросы в сеть не отправляются.
+    """
+    errors = check_config()
+    for error in errors:
+        logger.critical(error)
+    if errors:
+        sys.exit('Настройки содержат ошибки')
+    logger.info('Настройки в порядке')
+
+
+def configure_runtime() -> None:
+    """Создаём HTTP-сессии и загружаем шаблоны сообщений."""
+    global session, deadline_session
+    pool_size = max(HTTP_POOL_SIZE, POLL_THREADS)
+    session = create_session(pool_size)
+    deadline_session = create_session(pool_size, retries=0)
+    if TEMPLATES_FILE:
+        templates.load(TEMPLATES_FILE)
+
+
+def start_webhook():
+    """Запускаем приём событий и переводим опрос в режим сверки.
+
+    Возвращает очередь событий или None, если приём не настроен.
+    """
+    if not WEBHOOK_PORT:
+        return None
+    inbox = Inbox()
+    server = WebhookServer(
+        inbox, WEBHOOK_HOST, int(WEBHOOK_PORT), WEBHOOK_SECRET
+    )
+    global schedule
+    schedule = AdaptiveSchedule(
+        RECONCILE_INTERVAL,
+        max(MAX_RETRY_TIME, RECONCILE_INTERVAL),
+        RECONCILE_INTERVAL,
+        RETRY_JITTER,
+    )
+    server.start()
+    return inbox
+
+
+def run() -> None:
+    """Загружаем подписки и запускаем выбранный режим опроса."""
     if not check_tokens():
         message_error = 'Не заданы обязательные переменные окружения'
         logger.critical(message_error)
         sys.exit(message_error)
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    previous_time = ''
-    message_error = ''
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-            if len(homeworks) < 1:
-                logger.debug('Новых изменений не обнаружено')
-            else:
-                homework = homeworks[0]
-                if homework['date_updated'] == previous_time:
-                    logger.debug('Новых статусов не обнаружено')
-                else:
-                    previous_time = homework['date_updated']
-                    message = parse_status(homework)
-                    send_message(bot, message)
-            current_timestamp = response.get('current_date')
+    if mode_errors():
+        message_error = '; '.join(mode_errors())
+        logger.critical(message_error)
+        sys.exit(message_error)
+    configure_runtime()
+    tenants = get_tenants()
+    logger.info('Загружено подписок: %d', len(tenants))
+    metrics.TENANTS.set(len(tenants))
+    if METRICS_PORT:
+        metrics.start_metrics_server(int(METRICS_PORT))
+    if SHARD_WORKERS > 1:
+        run_sharded(tenants, SHARD_WORKERS)
+        return
+    checkpoints = get_checkpoint_store()
+    if checkpoints is not None:
+        restore_tenants(tenants, checkpoints)
+    spread_polls(tenants, STARTUP_SPREAD)
+    leases = get_lease_store()
+    inbox = start_webhook()
+    outbox = None if ASYNC_MODE else get_outbox()
+    pool = None if ASYNC_MODE else create_pool()
+    try:
+        if ASYNC_MODE:
+            from async_homework import run_async
+            run_async(tenants, checkpoints, leases, inbox)
+        else:
+            run_polling(tenants, checkpoints, leases=leases, inbox=inbox,
+                        outbox=outbox, pool=pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if outbox is not None:
+            outbox.close()
+        if leases is not None:
+            leases.close()
+        if checkpoints is not None:
+            checkpoints.close()
 
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message, exc_info=True)
-            if message != message_error:
-                send_message(bot, message)
-                message_error = message
-
-        finally:
-            time.sleep(RETRY_TIME)
+
+def poll_due(notify, queue: PollQueue, checkpoints=None,
+             leases=None) -> None:
+    """Опрашиваем подписки, время опроса которых наступило."""
+    now = time.monotonic()
+    for tenant in queue.pop_due(now):
+        if claim_tenant(tenant, leases, checkpoints):
+            metrics.POLL_LAG.observe(now - tenant.next_poll)
+            poll_tenant(notify, tenant, checkpoints)
+        queue.push(tenant)
+
+
+def poll_pooled(notify, queue: PollQueue, pool: PollPool, checkpoints=None,
+                leases=None) -> None:
+    """Опрашиваем подписки в пуле потоков.
+
+    Сначала разбираем завершённые запросы, затем отправляем в пул
+    запросы подписок, время опроса которых наступило. Подписка
+    возвращается в очередь после разбора ответа.
+    """
+    for tenant, future in pool.completed():
+        complete_poll(notify, tenant, future.result, checkpoints)
+        queue.push(tenant)
+    now = time.monotonic()
+    for tenant in queue.pop_due(now, pool.max_in_flight - len(pool)):
+        if (claim_tenant(tenant, leases, checkpoints)
+                and not short_circuit(tenant)):
+            metrics.POLL_LAG.observe(now - tenant.next_poll)
+            if pool.submit(tenant, timed_fetch, *poll_request(tenant)):
+                continue
+        queue.push(tenant)
+
+
+def create_pool():
+    """Создаём пулы потоков опроса и отправки, если они настроены."""
+    if POLL_THREADS <= 1:
+        return None
+    return PollPool(POLL_THREADS, SEND_THREADS, POLL_QUEUE_SIZE)
+
+
+def sent_callback(outbox=None, checkpoints=None):
+    """Кого очередь отправки извещает о доставленных сообщениях."""
+    if outbox is not None:
+        return outbox.mark_done
+    if isinstance(checkpoints, SentCheckpoints):
+        return checkpoints.mark_sent
+    return None
+
+
+def create_delivery(outbox=None, checkpoints=None, executor=None) -> tuple:
+    """Создаём очередь отправки в Telegram.
+
+    Возвращает очередь и функцию `notify(chat_id, message, key=None)`.
+    С журналом `outbox` сообщения о статусах сначала фиксируются в нём,
+    а журнал всегда сбрасывается на диск раньше контрольных точек. Без
+    журнала контрольные точки `checkpoints` (`SentCheckpoints`)
+    получают ключи отправленных сообщений.
+    С пулом `executor` сообщения в разные чаты отправляются параллельно.
+    """
+    import telegram
+    from telegram.utils.request import Request
+
+    bot = telegram.Bot(
+        token=TELEGRAM_TOKEN, base_url=f'{TELEGRAM_API_URL}/bot',
+        request=Request(
+            con_pool_size=SEND_THREADS,
+            connect_timeout=HTTP_CONNECT_TIMEOUT,
+            read_timeout=HTTP_READ_TIMEOUT,
+        ),
+    )
+    delivery = DeliveryQueue(
+        lambda chat_id, message: send_message_to(bot, chat_id, message),
+        chat_rate=TELEGRAM_CHAT_RATE,
+        global_rate=TELEGRAM_GLOBAL_RATE,
+        on_sent=sent_callback(outbox, checkpoints),
+        executor=executor,
+    )
+    if outbox is None:
+        return delivery, delivery.put
+    outbox.deliver = delivery.put
+    if checkpoints is not None:
+        checkpoints.before_flush = outbox.commit
+    outbox.replay()
+    return delivery, outbox.append
+
+
+def commit_pass(outbox=None, checkpoints=None) -> None:
+    """Фиксируем проход: журнал исходящих или отправленные состояния."""
+    if outbox is not None:
+        outbox.commit()
+    elif isinstance(checkpoints, SentCheckpoints):
+        checkpoints.apply()
+
+
+def idle_wait(queue: PollQueue, watched: bool = False,
+              leases=None) -> float:
+    """Сколько спать до следующего прохода цикла опроса.
+
+    Для списка подписок, который может меняться, и для аренд `leases`
+    сон ограничивается, чтобы вовремя применять изменения и продлевать
+    аренды.
+    """
+    deadline = queue.next_deadline()
+    if deadline is None:
+        return IDLE_WAIT
+    wait = deadline - time.monotonic()
+    if watched:
+        wait = min(wait, IDLE_WAIT)
+    if leases is not None:
+        wait = min(wait, leases.ttl / 3)
+    return wait
+
+
+def run_polling(tenants: list, checkpoints=None, on_tick=None,
+                leases=None, inbox=None, outbox=None, pool=None) -> None:
+    """Последовательно опрашиваем подписки в бесконечном цикле.
+
+    Подписки хранятся в очереди по времени опроса, и проход затрагивает
+    только те, которым пора опрашиваться. `on_tick(tenants)`
+    вызывается перед каждым проходом и может менять список подписок на
+    месте, возвращая True при изменении; сон между проходами тогда не
+    дольше `IDLE_WAIT`, чтобы изменения применялись быстро. Аренды `leases`
+    продлеваются не реже трёх раз за срок их действия. События из
+    `inbox` прерывают сон и обрабатываются сразу. Сообщения прохода
+    фиксируются в журнале `outbox` одной группой, а без журнала
+    контрольные точки записываются только после отправки сообщений.
+    С пулом потоков `pool` запросы к API и отправка сообщений идут
+    параллельно.
+    """
+    if outbox is None and checkpoints is not None:
+        checkpoints = SentCheckpoints(checkpoints)
+    delivery, notify = create_delivery(
+        outbox, checkpoints, pool and pool.send_executor
+    )
+    if pool is not None:
+        inbox = inbox or Inbox()
+        pool.on_done = inbox.wake
+    queue = PollQueue(tenants)
+    delivery.start()
+    try:
+        while True:
+            if on_tick is not None and on_tick(tenants):
+                queue.sync(tenants)
+            if leases is not None:
+                leases.renew()
+            if inbox is not None:
+                ingest_events(notify, tenants, inbox.drain(), checkpoints)
+            if pool is None:
+                poll_due(notify, queue, checkpoints, leases)
+            else:
+                poll_pooled(notify, queue, pool, checkpoints, leases)
+            commit_pass(outbox, checkpoints)
+            wait = idle_wait(queue, on_tick is not None, leases)
+            if wait > 0:
+                (time.sleep if inbox is None else inbox.wait)(wait)
+    finally:
+        delivery.stop()
+        commit_pass(outbox, checkpoints)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,161 @@
+import fcntl
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+def default_owner() -> str:
+    """Уникальное имя реплики."""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+class LeaseStore:
+    """Аренда подписок между репликами бота.
+
+    Подписку опрашивает только реплика, которая держит её аренду.
+    Аренда продлевается вызовом `renew()` и истекает через `ttl`
+    секунд, если держатель перестал её продлевать.
+    """
+
+    def __init__(self, ttl=30.0, owner=None):
+        self.ttl = ttl
+        self.owner = owner or default_owner()
+        self.held = set()
+
+    def _acquire(self, tenant_id: str) -> bool:
+        raise NotImplementedError
+
+    def _release(self, tenant_ids: set) -> None:
+        raise NotImplementedError
+
+    def acquire(self, tenant_id: str) -> bool:
+        """Берём или продлеваем аренду подписки."""
+        if self._acquire(tenant_id):
+            self.held.add(tenant_id)
+            return True
+        if tenant_id in self.held:
+            logger.warning('Аренда подписки %s перешла другой реплике',
+                           tenant_id)
+            self.held.discard(tenant_id)
+        return False
+
+    def renew(self) -> None:
+        """Продлеваем все удерживаемые аренды."""
+        for tenant_id in list(self.held):
+            self.acquire(tenant_id)
+
+    def close(self) -> None:
+        """Отпускаем все аренды, чтобы их сразу подхватили другие."""
+        if self.held:
+            self._release(self.held)
+            self.held = set()
+
+
+class SQLiteLeaseStore(LeaseStore):
+    """Аренды в общей базе SQLite со сроком действия."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.connection = sqlite3.connect(path, timeout=self.ttl)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS leases (tenant_id TEXT PRIMARY KEY, '
+            'owner TEXT NOT NULL, expires REAL NOT NULL)'
+        )
+        self.connection.commit()
+
+    def _acquire(self, tenant_id: str) -> bool:
+        now = time.time()
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO leases VALUES (?, ?, ?) '
+                'ON CONFLICT(tenant_id) DO UPDATE '
+                'SET owner = excluded.owner, expires = excluded.expires '
+                'WHERE leases.owner = excluded.owner OR leases.expires < ?',
+                (tenant_id, self.owner, now + self.ttl, now)
+            )
+        return cursor.rowcount == 1
+
+    def renew(self) -> None:
+        """Продлеваем все удерживаемые аренды одним запросом."""
+        if not self.held:
+            return
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                'UPDATE leases SET expires = ? WHERE owner = ?',
+                (now + self.ttl, self.owner)
+            )
+            rows = self.connection.execute(
+                'SELECT tenant_id FROM leases WHERE owner = ?', (self.owner,)
+            )
+            owned = {tenant_id for tenant_id, in rows}
+        for tenant_id in self.held - owned:
+            logger.warning('Аренда подписки %s перешла другой реплике',
+                           tenant_id)
+        self.held &= owned
+
+    def _release(self, tenant_ids: set) -> None:
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM leases WHERE tenant_id = ? AND owner = ?',
+                [(tenant_id, self.owner) for tenant_id in tenant_ids]
+            )
+
+    def close(self) -> None:
+        """Отпускаем аренды и закрываем базу."""
+        super().close()
+        self.connection.close()
+
+
+class FileLeaseStore(LeaseStore):
+    """Аренды на блокировках файлов в общем каталоге.
+
+    Блокировку снимает ОС, как только процесс-держатель завершился,
+    поэтому `ttl` здесь не нужен и продлевать аренды не требуется.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.files = {}
+        os.makedirs(path, exist_ok=True)
+
+    def _acquire(self, tenant_id: str) -> bool:
+        if tenant_id in self.files:
+            return True
+        file = open(os.path.join(self.path, f'{tenant_id}.lock'), 'a')
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            file.close()
+            return False
+        self.files[tenant_id] = file
+        return True
+
+    def renew(self) -> None:
+        """Блокировки не истекают, продлевать нечего."""
+
+    def _release(self, tenant_ids: set) -> None:
+        for tenant_id in tenant_ids:
+            self.files.pop(tenant_id).close()
+
+
+BACKENDS = {
+    'sqlite': SQLiteLeaseStore,
+    'file': FileLeaseStore,
+}
+
+
+def create_lease_store(backend: str, path: str, **kwargs) -> LeaseStore:
+    """Создаём хранилище аренд по имени бэкенда."""
+    try:
+        store_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f'Неизвестное хранилище аренд: {backend}')
+    return store_class(path, **kwargs)
@@ -0,0 +1,69 @@
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+THIRD_PARTY_LOGGERS = ('telegram', 'urllib3', 'requests', 'aiohttp',
+                       'asyncio')
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись журнала в одну строку JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Сериализуем запись в JSON."""
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class LazyQueueHandler(QueueHandler):
+    """Кладёт запись в очередь без форматирования.
+
+    Стандартный `QueueHandler.prepare` форматирует сообщение в
+    вызывающем потоке. Здесь это откладывается до потока
+    `QueueListener`, поэтому в аргументы записи стоит передавать только
+    неизменяемые значения.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Передаём запись как есть."""
+        return record
+
+
+def configure_logging(level=logging.DEBUG,
+                      json_output: bool = False) -> QueueListener:
+    """Настраиваем журнал: запись в stdout идёт в отдельном потоке.
+
+    Возвращает запущенный `QueueListener`; его нужно остановить
+    при завершении, чтобы вывести оставшиеся записи. Уровень `level`
+    относится к журналу бота: сторонние библиотеки пишут только
+    предупреждения и ошибки.
+    """
+    stream_handler = logging.StreamHandler(stream=sys.stdout)
+    if json_output:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, LazyQueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(LazyQueueHandler(records))
+    root.setLevel(level)
+    for name in THIRD_PARTY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    listener = QueueListener(
+        records, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    return listener
@@ -0,0 +1,217 @@
+import bisect
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_labels(labelnames, values) -> str:
+    if not labelnames:
+        return ''
+    pairs = ','.join(
+        f'{name}="{value}"' for name, value in zip(labelnames, values)
+    )
+    return f'{{{pairs}}}'
+
+
+class Metric:
+    """Базовая метрика в формате экспозиции Prometheus."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, label_values) -> tuple:
+        if len(label_values) != len(self.labelnames):
+            raise ValueError(
+                f'Метрика {self.name} ожидает метки {self.labelnames}'
+            )
+        return tuple(str(value) for value in label_values)
+
+    def samples(self):
+        """Строки значений метрики."""
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in items:
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}{labels} {value}'
+
+    def render(self) -> str:
+        """Метрика в текстовом формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, *label_values, amount=1) -> None:
+        """Увеличиваем счётчик."""
+        key = self._key(label_values)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, *label_values):
+        """Текущее значение счётчика."""
+        return self.values.get(self._key(label_values), 0)
+
+
+class Gauge(Counter):
+    """Значение, которое может как расти, так и уменьшаться."""
+
+    kind = 'gauge'
+
+    def set(self, value, *label_values) -> None:
+        """Устанавливаем значение."""
+        key = self._key(label_values)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    """Гистограмма распределения наблюдаемых значений."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values) -> None:
+        """Добавляем наблюдение."""
+        key = self._key(label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0)
+            )
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+
+    def count(self, *label_values) -> int:
+        """Число наблюдений."""
+        counts, _ = self.values.get(self._key(label_values), ([], 0.0))
+        return sum(counts)
+
+    def samples(self):
+        """Строки корзин, суммы и числа наблюдений."""
+        with self.lock:
+            items = [(key, (list(counts), total))
+                     for key, (counts, total) in self.values.items()]
+        labelnames = self.labelnames + ('le',)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                labels = _format_labels(labelnames, key + (bound,))
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {total}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+REGISTRY = []
+
+API_LATENCY = Histogram(
+    'homework_api_request_seconds',
+    'Длительность запроса к API Практикум.Домашка',
+)
+API_RESPONSES = Counter(
+    'homework_api_responses_total',
+    'Ответы API Практикум.Домашка по статус-коду',
+    ('status',),
+)
+CHECK_FAILURES = Counter(
+    'homework_check_response_failures_total',
+    'Ошибки проверки ответа API по типу исключения',
+    ('error',),
+)
+TELEGRAM_LATENCY = Histogram(
+    'homework_telegram_send_seconds',
+    'Длительность отправки сообщения в Telegram',
+)
+TELEGRAM_FAILURES = Counter(
+    'homework_telegram_send_failures_total',
+    'Неудачные отправки сообщений в Telegram',
+)
+MESSAGES_SENT = Counter(
+    'homework_messages_sent_total',
+    'Отправленные в Telegram сообщения',
+)
+POLL_LAG = Histogram(
+    'homework_poll_lag_seconds',
+    'Отставание опроса от расписания',
+)
+TENANTS = Gauge(
+    'homework_tenants',
+    'Число опрашиваемых подписок',
+)
+CIRCUIT_STATE = Gauge(
+    'homework_circuit_state',
+    'Состояние цепи эндпоинта: 0 замкнута, 1 проба, 2 разомкнута',
+    ('endpoint',),
+)
+CIRCUIT_REJECTED = Counter(
+    'homework_circuit_rejected_total',
+    'Запросы, отклонённые разомкнутой цепью',
+    ('endpoint',),
+)
+CYCLE_OVERRUNS = Counter(
+    'homework_cycle_overruns_total',
+    'Циклы опроса, прерванные по истечении срока',
+)
+WEBHOOK_EVENTS = Counter(
+    'homework_webhook_events_total',
+    'События приёмника по результату обработки',
+    ('result',),
+)
+
+
+def render() -> str:
+    """Все метрики в текстовом формате Prometheus."""
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаёт метрики по адресу /metrics."""
+
+    def log_message(self, format, *args):
+        """Не засоряем вывод журналом запросов."""
+
+    def do_GET(self):
+        """Отдаём метрики."""
+        if self.path != '/metrics':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = render().encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int, host: str = '') -> ThreadingHTTPServer:
+    """Запускаем HTTP-сервер метрик в фоновом потоке."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    ).start()
+    return server
@@ -0,0 +1,174 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MAX_DONE = 10000
+COMPACT_EVERY = 10000
+
+
+def message_key(tenant_id, homework_key, date_updated) -> str:
+    """Ключ идемпотентности сообщения о статусе работы."""
+    return f'{tenant_id}:{homework_key}:{date_updated}'
+
+
+class Outbox:
+    """Журнал исходящих сообщений (write-ahead log).
+
+    Сообщение с ключом сначала дописывается в журнал и только после
+    `commit()` передаётся в `deliver(chat_id, text, key)`. Один
+    `commit()` сбрасывает на диск всю накопленную группу записей одним
+    fsync. Доставленные сообщения отмечаются `mark_done()`; их ключи
+    (последние `max_done`) не дают поставить то же сообщение повторно.
+    Журнал сжимается при открытии и после `compact_every` записей.
+    Журнал открывается только одним процессом: второй получит
+    RuntimeError, а не повторит чужие недоставленные сообщения.
+    """
+
+    def __init__(self, path, deliver=None, fsync=True, max_done=MAX_DONE,
+                 compact_every=COMPACT_EVERY):
+        self.path = path
+        self.deliver = deliver
+        self.fsync = fsync
+        self.max_done = max_done
+        self.compact_every = compact_every
+        self.pending = OrderedDict()
+        self.done = OrderedDict()
+        self.buffer = []
+        self.uncommitted = OrderedDict()
+        self.written = 0
+        self.lock = threading.Lock()
+        self.guard = self._lock_path(f'{path}.lock')
+        self._read()
+        self._compact()
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def _lock_path(path):
+        guard = open(path, 'w')
+        try:
+            fcntl.flock(guard, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            guard.close()
+            raise RuntimeError(
+                f'Журнал исходящих {path} уже открыт другим процессом'
+            )
+        return guard
+
+    def __len__(self):
+        return len(self.pending)
+
+    def _read(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(
+                        'Пропущена повреждённая запись в %s', self.path
+                    )
+                    continue
+                if record['op'] == 'add':
+                    self.pending[record['key']] = (
+                        record['chat_id'], record['text']
+                    )
+                else:
+                    self.pending.pop(record['key'], None)
+                    self._remember_done(record['key'])
+
+    def _remember_done(self, key) -> None:
+        self.done[key] = None
+        self.done.move_to_end(key)
+        while len(self.done) > self.max_done:
+            self.done.popitem(last=False)
+
+    def _compact(self) -> None:
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            for key in self.done:
+                file.write(json.dumps({'op': 'done', 'key': key}))
+                file.write('\n')
+            for key, (chat_id, text) in self.pending.items():
+                file.write(json.dumps({
+                    'op': 'add', 'key': key, 'chat_id': chat_id,
+                    'text': text,
+                }, ensure_ascii=False))
+                file.write('\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+        self.written = 0
+
+    def append(self, chat_id, text: str, key=None) -> None:
+        """Добавляем сообщение в группу на запись.
+
+        Сообщение без ключа передаётся в `deliver` сразу, мимо журнала.
+        Сообщение с уже известным ключом пропускается.
+        """
+        if key is None:
+            self.deliver(chat_id, text, None)
+            return
+        with self.lock:
+            if (key in self.pending or key in self.done
+                    or key in self.uncommitted):
+                logger.debug('Сообщение %s уже в журнале', key)
+                return
+            self.uncommitted[key] = (chat_id, text)
+            self.buffer.append(json.dumps({
+                'op': 'add', 'key': key, 'chat_id': chat_id, 'text': text,
+            }, ensure_ascii=False))
+
+    def commit(self) -> None:
+        """Записываем группу на диск и отдаём новые сообщения на доставку."""
+        with self.lock:
+            if not self.buffer:
+                return
+            self.file.write('\n'.join(self.buffer) + '\n')
+            self.file.flush()
+            if self.fsync and self.uncommitted:
+                os.fsync(self.file.fileno())
+            self.written += len(self.buffer)
+            self.buffer = []
+            ready = self.uncommitted
+            self.uncommitted = OrderedDict()
+            self.pending.update(ready)
+            if self.written >= self.compact_every:
+                self.file.close()
+                self._compact()
+                self.file = open(self.path, 'a', encoding='utf-8')
+        for key, (chat_id, text) in ready.items():
+            self.deliver(chat_id, text, key)
+
+    def mark_done(self, keys) -> None:
+        """Отмечаем сообщения доставленными.
+
+        Отметки пишутся на диск со следующей группой; если они
+        потеряются, сообщения будут доставлены ещё раз.
+        """
+        with self.lock:
+            for key in keys:
+                if self.pending.pop(key, None) is not None:
+                    self._remember_done(key)
+                    self.buffer.append(json.dumps({'op': 'done', 'key': key}))
+
+    def replay(self) -> None:
+        """Передаём на доставку сообщения, не доставленные до остановки."""
+        with self.lock:
+            entries = list(self.pending.items())
+        if entries:
+            logger.info('Повторная доставка сообщений из журнала: %d',
+                        len(entries))
+        for key, (chat_id, text) in entries:
+            self.deliver(chat_id, text, key)
+
+    def close(self) -> None:
+        """Записываем накопленное и закрываем журнал."""
+        self.commit()
+        self.file.close()
+        self.guard.close()
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PollPool:
+    """Пулы потоков для блокирующих запросов к API и отправки сообщений.
+
+    Запрос подписки выполняется в одном из `poll_workers` потоков, а
+    результат забирается через `completed()` в потоке цикла опроса.
+    У подписки не больше одного запроса в работе, поэтому ответы
+    применяются в порядке запросов. Одновременно в работе не больше
+    `max_in_flight` запросов: остальные подписки ждут свободного места.
+    Для отправки сообщений создаётся отдельный пул из `send_workers`
+    потоков; `on_done()` вызывается по завершении каждого запроса.
+    """
+
+    def __init__(self, poll_workers, send_workers=1, max_in_flight=None,
+                 on_done=None):
+        self.executor = ThreadPoolExecutor(
+            poll_workers, thread_name_prefix='poll'
+        )
+        self.send_executor = None
+        if send_workers > 1:
+            self.send_executor = ThreadPoolExecutor(
+                send_workers, thread_name_prefix='send'
+            )
+        self.max_in_flight = max_in_flight or 2 * poll_workers
+        self.on_done = on_done
+        self.in_flight = OrderedDict()
+
+    def __len__(self):
+        return len(self.in_flight)
+
+    def __contains__(self, tenant_id):
+        return tenant_id in self.in_flight
+
+    def full(self) -> bool:
+        """В работе уже `max_in_flight` запросов."""
+        return len(self.in_flight) >= self.max_in_flight
+
+    def submit(self, tenant, fetch, *args) -> bool:
+        """Отправляем `fetch(*args)` в пул от имени подписки.
+
+        Возвращает False, если пул заполнен или запрос подписки уже
+        в работе.
+        """
+        if self.full() or tenant.tenant_id in self.in_flight:
+            return False
+        future = self.executor.submit(fetch, *args)
+        self.in_flight[tenant.tenant_id] = (tenant, future)
+        if self.on_done is not None:
+            future.add_done_callback(lambda _: self.on_done())
+        return True
+
+    def completed(self) -> list:
+        """Забираем завершённые запросы в порядке их отправки.
+
+        Возвращает пары из подписки и future с результатом запроса.
+        """
+        done = [
+            (tenant_id, tenant, future)
+            for tenant_id, (tenant, future) in self.in_flight.items()
+            if future.done()
+        ]
+        for tenant_id, _, _ in done:
+            del self.in_flight[tenant_id]
+        return [(tenant, future) for _, tenant, future in done]
+
+    def shutdown(self) -> None:
+        """Дожидаемся запросов в работе и останавливаем потоки."""
+        self.executor.shutdown(wait=True)
+        if self.send_executor is not None:
+            self.send_executor.shutdown(wait=True)
@@ -0,0 +1,57 @@
+import hashlib
+import re
+
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(\d+)')
+
+
+def fingerprint(body: bytes) -> tuple:
+    """Отпечаток тела ответа без учёта `current_date`.
+
+    Возвращает отпечаток и значение `current_date`, найденное в теле
+    без разбора JSON (None, если ключа нет).
+    """
+    match = CURRENT_DATE.search(body)
+    current_date = None
+    if match is not None:
+        current_date = int(match.group(1))
+        body = body[:match.start(1)] + body[match.end(1):]
+    return hashlib.blake2b(body, digest_size=16).digest(), current_date
+
+
+class ResponseCache:
+    """Кеш последних ответов API по подпискам.
+
+    Хранит ETag/Last-Modified, если API их присылает, и отпечаток тела
+    последнего полностью обработанного ответа.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def conditional_headers(self, tenant_id) -> dict:
+        """Заголовки условного запроса для подписки."""
+        entry = self.entries.get(tenant_id)
+        if entry is None:
+            return {}
+        etag, last_modified, _ = entry
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def is_unchanged(self, tenant_id, digest: bytes) -> bool:
+        """Совпадает ли ответ с последним обработанным."""
+        entry = self.entries.get(tenant_id)
+        return entry is not None and entry[2] == digest
+
+    def remember(self, tenant_id, headers, digest: bytes) -> None:
+        """Запоминаем обработанный ответ."""
+        self.entries[tenant_id] = (
+            headers.get('ETag'), headers.get('Last-Modified'), digest
+        )
+
+    def forget(self, tenant_id) -> None:
+        """Сбрасываем кеш подписки."""
+        self.entries.pop(tenant_id, None)
@@ -0,0 +1,145 @@
+import heapq
+import itertools
+import random
+import time
+
+REVIEWING = 'reviewing'
+
+
+class AdaptiveSchedule:
+    """Адаптивный интервал опроса API.
+
+    Пока работа на проверке, опрашиваем часто; когда изменений нет
+    или API отвечает ошибкой, интервал растёт экспоненциально до
+    `max_interval`.
+    """
+
+    def __init__(self, min_interval, max_interval, base_interval,
+                 jitter=0.1):
+        if not 0 < min_interval <= base_interval <= max_interval:
+            raise ValueError(
+                'Интервалы опроса должны удовлетворять условию '
+                '0 < min <= base <= max'
+            )
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.base_interval = base_interval
+        self.jitter = jitter
+
+    def next_interval(self, interval, homeworks, reviewing=False) -> float:
+        """Вычисляем следующий интервал по результату опроса.
+
+        `homeworks` равен None, если опрос завершился ошибкой.
+        `reviewing` говорит, что одна из уже известных работ всё ещё на
+        проверке: API возвращает только изменившиеся работы, поэтому
+        пустой ответ не значит, что проверка закончилась.
+        """
+        interval = interval or self.base_interval
+        if homeworks is not None and (reviewing or any(
+            homework.get('status') == REVIEWING for homework in homeworks
+        )):
+            return self.min_interval
+        if homeworks:
+            return self.base_interval
+        return min(interval * 2, self.max_interval)
+
+    def delay(self, interval) -> float:
+        """Добавляем к интервалу случайный разброс."""
+        spread = interval * self.jitter
+        return max(
+            self.min_interval,
+            interval + random.uniform(-spread, spread)
+        )
+
+
+def spread_polls(tenants: list, window: float, now=None) -> None:
+    """Равномерно распределяем первые опросы подписок по окну `window`.
+
+    Так после запуска запросы к API не уходят одной пачкой.
+    """
+    if len(tenants) < 2 or window <= 0:
+        return
+    now = time.monotonic() if now is None else now
+    step = window / len(tenants)
+    for index, tenant in enumerate(tenants):
+        tenant.next_poll = now + index * step
+
+
+class PollQueue:
+    """Очередь подписок по времени следующего опроса на основе кучи.
+
+    `pop_due()` достаёт подписки, время опроса которых наступило, и
+    они не возвращаются в очередь, пока их не передадут в `push()`.
+    Перенос опроса стоит O(log n): старая запись в куче не удаляется,
+    а пропускается при извлечении. Если `next_poll` подписки отодвинули
+    без `push()`, запись переставляется на новое время при извлечении.
+    """
+
+    def __init__(self, tenants=()):
+        self.heap = []
+        self.entries = {}
+        self.counter = itertools.count()
+        for tenant in tenants:
+            self.push(tenant)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, tenant) -> None:
+        """Ставим подписку в очередь на время `tenant.next_poll`."""
+        sequence = next(self.counter)
+        self.entries[tenant.tenant_id] = (sequence, tenant)
+        heapq.heappush(self.heap, (tenant.next_poll, sequence, tenant))
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self._compact()
+
+    def remove(self, tenant_id) -> None:
+        """Убираем подписку из очереди."""
+        self.entries.pop(tenant_id, None)
+
+    def sync(self, tenants: list) -> None:
+        """Приводим очередь к изменившемуся списку подписок.
+
+        Новые подписки ставятся в очередь, пропавшие убираются;
+        извлечённые и ещё не возвращённые подписки остаются вне кучи.
+        """
+        current = {tenant.tenant_id: tenant for tenant in tenants}
+        for tenant_id in self.entries.keys() - current.keys():
+            self.remove(tenant_id)
+        for tenant_id, tenant in current.items():
+            entry = self.entries.get(tenant_id)
+            if entry is None or entry[1] is not tenant:
+                self.push(tenant)
+
+    def _is_live(self, sequence, tenant) -> bool:
+        entry = self.entries.get(tenant.tenant_id)
+        return entry is not None and entry[0] == sequence
+
+    def _compact(self) -> None:
+        self.heap = [
+            item for item in self.heap if self._is_live(item[1], item[2])
+        ]
+        heapq.heapify(self.heap)
+
+    def next_deadline(self):
+        """Ближайшее время опроса или None, если очередь пуста."""
+        while self.heap and not self._is_live(*self.heap[0][1:]):
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now, limit=None) -> list:
+        """Достаём не больше `limit` подписок, которым пора опрашиваться."""
+        due = []
+        while self.heap and (limit is None or len(due) < limit):
+            deadline, sequence, tenant = self.heap[0]
+            if deadline > now:
+                break
+            heapq.heappop(self.heap)
+            if not self._is_live(sequence, tenant):
+                continue
+            if tenant.next_poll > now:
+                self.push(tenant)
+                continue
+            self.entries[tenant.tenant_id] = (None, tenant)
+            due.append(tenant)
+        return due
@@ -0,0 +1,102 @@
+import json
+from datetime import datetime
+from typing import NamedTuple
+
+from exceptions import ErrorValueDictionary, ObjectNotInstance
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+KEY_ERROR = 'Ошибка получения значения по ключу в словаре'
+
+
+def loads(body):
+    """Разбираем JSON быстрым декодером, если он установлен."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_response(response):
+    """Разбираем тело HTTP-ответа.
+
+    Объекты без сырого тела (например, заглушки в тестах) разбираются
+    своим методом `json()`.
+    """
+    content = getattr(response, 'content', None)
+    if isinstance(content, (bytes, str)):
+        return loads(content)
+    return response.json()
+
+
+def parse_date(value: str) -> int:
+    """Переводим дату из ответа API в секунды эпохи."""
+    try:
+        return int(
+            datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        )
+    except (AttributeError, TypeError, ValueError):
+        raise ObjectNotInstance(
+            f'Некорректная дата обновления работы: {value!r}'
+        )
+
+
+class HomeworkRecord(NamedTuple):
+    """Проверенная запись о домашней работе.
+
+    `status` — номер статуса в порядке, заданном валидатору,
+    `date_updated` — секунды эпохи.
+    """
+
+    key: str
+    name: str
+    status: int
+    date_updated: int
+
+
+class HomeworkValidator:
+    """Проверка ответа API за один проход.
+
+    Исключения совпадают с `check_response` и `parse_status`:
+    TypeError для ответа не-словаря, KeyError для отсутствующих
+    ключей, ObjectNotInstance для неверных типов и
+    ErrorValueDictionary для недокументированного статуса.
+    """
+
+    def __init__(self, statuses):
+        self.codes = {status: code for code, status in enumerate(statuses)}
+
+    def validate(self, response) -> list:
+        """Проверяем ответ и возвращаем записи о работах."""
+        if not isinstance(response, dict):
+            raise TypeError('Переданный объект не является словарём')
+        homeworks = response.get('homeworks')
+        if homeworks is None:
+            raise KeyError(KEY_ERROR)
+        if not isinstance(homeworks, list):
+            raise ObjectNotInstance('Полученный объект не является списком')
+        return [self.record(homework) for homework in homeworks]
+
+    def record(self, homework) -> HomeworkRecord:
+        """Проверяем одну работу и собираем из неё запись."""
+        if not isinstance(homework, dict):
+            raise ObjectNotInstance(
+                'Полученная домашняя работа не является словарём'
+            )
+        name = homework.get('homework_name')
+        status = homework.get('status')
+        date_updated = homework.get('date_updated')
+        if name is None or status is None or date_updated is None:
+            raise KeyError(KEY_ERROR)
+        code = self.codes.get(status)
+        if code is None:
+            raise ErrorValueDictionary(
+                f'Недокументированный статус домашней работы: {status!r}'
+            )
+        key = homework.get('id')
+        return HomeworkRecord(
+            name if key is None else str(key), name, code,
+            parse_date(date_updated)
+        )
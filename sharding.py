@@ -0,0 +1,315 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import queue
+import time
+
+from scheduler import spread_polls
+
+logger = logging.getLogger(__name__)
+
+REPLICAS = 100
+ACK_TIMEOUT = 30
+SUPERVISE_INTERVAL = 5
+
+
+def _hash(key: str) -> int:
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HashRing:
+    """Консистентное хеширование подписок по узлам.
+
+    При добавлении или удалении узла переезжают только подписки,
+    попавшие на его участки кольца.
+    """
+
+    def __init__(self, nodes=(), replicas=REPLICAS):
+        self.replicas = replicas
+        self.points = []
+        self.owners = {}
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self):
+        return len(self.points) // self.replicas
+
+    def add(self, node: str) -> None:
+        """Добавляем узел на кольцо."""
+        for replica in range(self.replicas):
+            point = _hash(f'{node}#{replica}')
+            self.owners[point] = node
+            bisect.insort(self.points, point)
+
+    def remove(self, node: str) -> None:
+        """Убираем узел с кольца."""
+        for replica in range(self.replicas):
+            point = _hash(f'{node}#{replica}')
+            del self.owners[point]
+            self.points.remove(point)
+
+    def node_for(self, key: str) -> str:
+        """Узел, которому принадлежит ключ."""
+        if not self.points:
+            raise LookupError('На кольце нет ни одного узла')
+        index = bisect.bisect(self.points, _hash(key)) % len(self.points)
+        return self.owners[self.points[index]]
+
+
+def select_shard(tenants: list, index: int, count: int) -> list:
+    """Подписки, которые приходятся на шард `index` из `count`.
+
+    Так несколько независимых процессов или dyno делят подписки между
+    собой без координатора.
+    """
+    ring = HashRing(f'shard-{number}' for number in range(count))
+    node = f'shard-{index}'
+    return [
+        tenant for tenant in tenants
+        if ring.node_for(tenant.tenant_id) == node
+    ]
+
+
+def tenant_spec(tenant) -> dict:
+    """Параметры подписки для передачи в другой процесс."""
+    return {
+        'practicum_token': tenant.practicum_token,
+        'chat_id': tenant.chat_id,
+        'current_date': tenant.current_date,
+        'tenant_id': tenant.tenant_id,
+        'locale': tenant.locale,
+    }
+
+
+def newer_state(first, second):
+    """Выбираем более свежее из двух состояний подписки."""
+    if first is None or second is None:
+        return first or second
+    if (second.get('current_date') or 0) > (first.get('current_date') or 0):
+        return second
+    return first
+
+
+def add_tenants(tenants: list, payload: list, checkpoints) -> None:
+    """Добавляем подписки с переданным координатором состоянием.
+
+    Из переданного состояния и контрольной точки берётся более свежее.
+    """
+    import homework
+
+    added = [homework.Tenant(**spec) for spec, _ in payload]
+    saved = checkpoints.load() if checkpoints is not None else {}
+    for tenant, (_, state) in zip(added, payload):
+        state = newer_state(state, saved.get(tenant.tenant_id))
+        if state is not None:
+            tenant.restore(state, homework.STATUSES)
+    spread_polls(added, homework.STARTUP_SPREAD)
+    tenants.extend(added)
+
+
+def remove_tenants(tenants: list, tenant_ids, checkpoints) -> dict:
+    """Убираем подписки и возвращаем их состояние."""
+    import homework
+
+    removed_ids = set(tenant_ids)
+    states = {
+        tenant.tenant_id: tenant.checkpoint(homework.STATUSES)
+        for tenant in tenants if tenant.tenant_id in removed_ids
+    }
+    tenants[:] = [t for t in tenants if t.tenant_id not in removed_ids]
+    if checkpoints is not None:
+        for tenant_id, state in states.items():
+            checkpoints.save(tenant_id, state)
+        checkpoints.flush()
+    return states
+
+
+def apply_control(node, tenants: list, control, acks, checkpoints) -> bool:
+    """Применяем команды координатора к подпискам воркера.
+
+    `add` добавляет подписки, `remove` убирает их и возвращает
+    координатору состояние, `stop` завершает воркер. Возвращает True,
+    если список подписок изменился.
+    """
+    changed = False
+    while True:
+        try:
+            command, payload = control.get_nowait()
+        except queue.Empty:
+            return changed
+        changed = True
+        if command == 'add':
+            add_tenants(tenants, payload, checkpoints)
+        elif command == 'remove':
+            acks.put((node, remove_tenants(tenants, payload, checkpoints)))
+        elif command == 'stop':
+            raise SystemExit
+        logger.info('%s: подписок в шарде %d', node, len(tenants))
+
+
+def worker_main(node, control, acks) -> None:
+    """Точка входа процесса-воркера: опрос подписок своего шарда."""
+    import homework
+
+    listener = homework.configure_logging(
+        homework.LOG_LEVEL, homework.LOG_JSON
+    )
+    homework.configure_runtime()
+    checkpoints = homework.get_checkpoint_store()
+    leases = homework.get_lease_store()
+    outbox = homework.get_outbox(node)
+    tenants = []
+    try:
+        homework.run_polling(
+            tenants, checkpoints,
+            lambda tenants: apply_control(
+                node, tenants, control, acks, checkpoints
+            ),
+            leases,
+            outbox=outbox,
+        )
+    except SystemExit:
+        logger.info('%s: остановлен', node)
+    finally:
+        if outbox is not None:
+            outbox.close()
+        if leases is not None:
+            leases.close()
+        if checkpoints is not None:
+            checkpoints.close()
+        listener.stop()
+
+
+class ShardCoordinator:
+    """Распределяет подписки по процессам-воркерам.
+
+    Подписка переезжает на новый воркер только после того, как
+    прежний убрал её и вернул состояние, поэтому одну подписку никогда
+    не опрашивают два воркера сразу, а уже отправленные уведомления
+    не повторяются.
+    """
+
+    def __init__(self, tenants: list, replicas=REPLICAS, target=None):
+        self.specs = {tenant.tenant_id: tenant_spec(tenant)
+                      for tenant in tenants}
+        self.ring = HashRing(replicas=replicas)
+        self.context = multiprocessing.get_context('spawn')
+        self.target = target or worker_main
+        self.acks = self.context.Queue()
+        self.workers = {}
+        self.assignment = {}
+        self.states = {}
+        self.counter = 0
+
+    def _spawn(self, node: str) -> None:
+        control = self.context.Queue()
+        process = self.context.Process(
+            target=self.target, args=(node, control, self.acks),
+            name=node,
+        )
+        process.start()
+        self.workers[node] = (process, control)
+
+    def add_worker(self) -> str:
+        """Запускаем новый воркер и перераспределяем подписки."""
+        node = f'worker-{self.counter}'
+        self.counter += 1
+        self._spawn(node)
+        self.ring.add(node)
+        self.rebalance()
+        return node
+
+    def remove_worker(self, node: str) -> None:
+        """Передаём подписки воркера остальным и останавливаем его."""
+        self.ring.remove(node)
+        self.rebalance()
+        process, control = self.workers.pop(node)
+        control.put(('stop', None))
+        process.join(ACK_TIMEOUT)
+
+    def rebalance(self) -> None:
+        """Переносим подписки, у которых сменился владелец."""
+        removals, additions = {}, {}
+        for tenant_id in self.specs:
+            owner = self.ring.node_for(tenant_id)
+            previous = self.assignment.get(tenant_id)
+            if owner == previous:
+                continue
+            if previous is not None:
+                removals.setdefault(previous, []).append(tenant_id)
+            additions.setdefault(owner, []).append(tenant_id)
+            self.assignment[tenant_id] = owner
+        waiting = set()
+        for node, tenant_ids in removals.items():
+            process, control = self.workers[node]
+            if process.is_alive():
+                control.put(('remove', tenant_ids))
+                waiting.add(node)
+        self._wait_acks(waiting)
+        for node, tenant_ids in additions.items():
+            _, control = self.workers[node]
+            control.put(('add', self._payload(tenant_ids)))
+        if removals or additions:
+            logger.info('Перераспределено подписок: %d', sum(
+                len(tenant_ids) for tenant_ids in additions.values()
+            ))
+
+    def _wait_acks(self, waiting: set) -> None:
+        deadline = time.monotonic() + ACK_TIMEOUT
+        while waiting:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                logger.error('Воркеры не подтвердили передачу подписок: %s',
+                             ', '.join(sorted(waiting)))
+                return
+            try:
+                node, states = self.acks.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            self.states.update(states)
+            waiting.discard(node)
+
+    def _payload(self, tenant_ids) -> list:
+        return [(self.specs[tenant_id], self.states.pop(tenant_id, None))
+                for tenant_id in tenant_ids]
+
+    def restart_dead(self) -> None:
+        """Перезапускаем упавшие воркеры с тем же шардом.
+
+        Состояние подписок воркер берёт только из контрольных точек:
+        копия координатора устаревает сразу после передачи.
+        """
+        for node, (process, _) in list(self.workers.items()):
+            if process.is_alive():
+                continue
+            logger.error('%s завершился с кодом %s, перезапускаем',
+                         node, process.exitcode)
+            self._spawn(node)
+            _, control = self.workers[node]
+            control.put(('add', [
+                (self.specs[tenant_id], None)
+                for tenant_id, owner in self.assignment.items()
+                if owner == node
+            ]))
+
+    def stop(self) -> None:
+        """Останавливаем все воркеры."""
+        for process, control in self.workers.values():
+            control.put(('stop', None))
+        for process, _ in self.workers.values():
+            process.join(ACK_TIMEOUT)
+
+
+def run_sharded(tenants: list, workers: int) -> None:
+    """Опрашиваем подписки в `workers` процессах."""
+    coordinator = ShardCoordinator(tenants)
+    for _ in range(workers):
+        coordinator.add_worker()
+    try:
+        while True:
+            time.sleep(SUPERVISE_INTERVAL)
+            coordinator.restart_dead()
+    finally:
+        coordinator.stop()
@@ -0,0 +1,68 @@
+import json
+
+from exceptions import ErrorValueDictionary
+
+NAME_PLACEHOLDER = '{homework_name}'
+VERDICT_PLACEHOLDER = '{verdict}'
+
+
+class TemplateRegistry:
+    """Реестр шаблонов сообщений о статусе работы по локалям.
+
+    Шаблон содержит подстановки `{homework_name}` и `{verdict}`.
+    При добавлении локали каждый статус заранее раскладывается на
+    префикс и суффикс вокруг названия работы, так что сообщение
+    собирается одной конкатенацией.
+    """
+
+    def __init__(self, default_locale):
+        self.default_locale = default_locale
+        self.compiled = {}
+
+    def add_locale(self, locale: str, template: str, verdicts: dict) -> None:
+        """Компилируем шаблон и вердикты локали.
+
+        Статусы, которых нет в `verdicts`, берутся из локали по
+        умолчанию.
+        """
+        if template.count(NAME_PLACEHOLDER) != 1:
+            raise ValueError(
+                f'Шаблон локали {locale} должен содержать '
+                f'{NAME_PLACEHOLDER} ровно один раз'
+            )
+        prefix, suffix = template.split(NAME_PLACEHOLDER)
+        compiled = dict(self.compiled.get(self.default_locale, {}))
+        for status, verdict in verdicts.items():
+            compiled[status] = (
+                prefix.replace(VERDICT_PLACEHOLDER, verdict),
+                suffix.replace(VERDICT_PLACEHOLDER, verdict),
+            )
+        self.compiled[locale] = compiled
+
+    def load(self, path: str) -> None:
+        """Добавляем локали из JSON-файла.
+
+        Файл содержит объект вида
+        `{"en": {"template": "...", "verdicts": {"approved": "..."}}}`.
+        """
+        with open(path, encoding='utf-8') as file:
+            locales = json.load(file)
+        for locale, config in locales.items():
+            self.add_locale(locale, config['template'], config['verdicts'])
+
+    def render(self, homework_name: str, homework_status: str,
+               locale: str = None) -> str:
+        """Сообщение о статусе работы на языке подписки.
+
+        Для неизвестной локали используется локаль по умолчанию.
+        """
+        parts = self.compiled.get(locale) or self.compiled[
+            self.default_locale
+        ]
+        try:
+            prefix, suffix = parts[homework_status]
+        except KeyError as error:
+            raise ErrorValueDictionary(
+                f'Недокументированный статус домашней работы: {error}'
+            )
+        return prefix + homework_name + suffix
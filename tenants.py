@@ -0,0 +1,100 @@
+import json
+import time
+
+
+STATUS_BITS = 4
+STATUS_MASK = (1 << STATUS_BITS) - 1
+
+
+def pack_homework(status: int, date_updated: int) -> int:
+    """Упаковываем номер статуса и дату обновления работы в одно число.
+
+    Одно целое занимает в памяти меньше, чем строка с датой или
+    отдельный объект с полями.
+    """
+    return date_updated << STATUS_BITS | status
+
+
+def unpack_homework(value: int) -> tuple:
+    """Номер статуса и дата обновления из упакованного значения."""
+    return value & STATUS_MASK, value >> STATUS_BITS
+
+
+class Tenant:
+    """Подписка на статусы: токен Практикума, чат и состояние опроса."""
+
+    __slots__ = (
+        'tenant_id', 'practicum_token', 'chat_id', 'current_date', 'seen',
+        'errors', 'outage', 'interval', 'next_poll', 'locale',
+    )
+
+    def __init__(self, practicum_token, chat_id, current_date=None,
+                 tenant_id=None, locale=None):
+        self.tenant_id = str(tenant_id or chat_id)
+        self.practicum_token = practicum_token
+        self.chat_id = chat_id
+        self.current_date = current_date or int(time.time())
+        self.seen = {}
+        self.errors = None
+        self.outage = False
+        self.interval = 0
+        self.next_poll = time.monotonic()
+        self.locale = locale
+
+    def __repr__(self):
+        return f'Tenant({self.tenant_id!r})'
+
+    @property
+    def headers(self) -> dict:
+        """Заголовки запроса к API Практикум.Домашка."""
+        return {'Authorization': f'OAuth {self.practicum_token}'}
+
+    def has_status(self, status: int) -> bool:
+        """Есть ли среди известных работ работа с номером статуса."""
+        return any(
+            value & STATUS_MASK == status for value in self.seen.values()
+        )
+
+    def checkpoint(self, statuses) -> dict:
+        """Состояние подписки для сохранения между перезапусками.
+
+        Статусы сохраняются строками из `statuses`, чтобы контрольные
+        точки не зависели от нумерации.
+        """
+        seen = {}
+        for key, value in self.seen.items():
+            status, date_updated = unpack_homework(value)
+            seen[key] = [statuses[status], date_updated]
+        return {'current_date': self.current_date, 'seen': seen}
+
+    def restore(self, state: dict, statuses) -> None:
+        """Восстанавливаем состояние подписки из контрольной точки."""
+        codes = {status: code for code, status in enumerate(statuses)}
+        self.current_date = state.get('current_date') or self.current_date
+        self.seen = {
+            key: pack_homework(codes[status], date_updated)
+            for key, (status, date_updated) in state.get('seen', {}).items()
+            if status in codes
+        }
+
+
+def load_tenants(path: str) -> list:
+    """Загружаем подписки из JSON-файла.
+
+    Файл содержит список объектов с ключами `practicum_token`,
+    `chat_id` и необязательными `current_date`, `id` и `locale`.
+    """
+    with open(path, encoding='utf-8') as file:
+        subscriptions = json.load(file)
+    if not isinstance(subscriptions, list):
+        raise TypeError('Файл подписок должен содержать список')
+    return [
+        Tenant(
+            practicum_token=subscription['practicum_token'],
+            chat_id=subscription['chat_id'],
+            current_date=subscription.get('current_date'),
+            tenant_id=subscription.get('id'),
+            locale=subscription.get('locale'),
+        )
+        for subscription in subscriptions
+    ]
@@ -0,0 +1,233 @@
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web  # noqa: E402
+
+
+async def _serve(routes):
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+class TestAsyncHomework:
+
+    def test_poll_tenant_async(self, monkeypatch, random_timestamp):
+        import async_homework
+        import homework
+
+        sent = []
+
+        async def statuses(request):
+            assert request.headers['Authorization'] == 'OAuth token'
+            return web.json_response({
+                'homeworks': [{
+                    'homework_name': 'hw123',
+                    'status': 'approved',
+                    'date_updated': '2020-02-13T14:40:57Z',
+                }],
+                'current_date': random_timestamp,
+            })
+
+        async def send(request):
+            sent.append(await request.json())
+            return web.json_response({'ok': True})
+
+        async def scenario():
+            runner, url = await _serve([
+                web.get('/homework_statuses/', statuses),
+                web.post('/botTOKEN/sendMessage', send),
+            ])
+            monkeypatch.setattr(homework, 'ENDPOINT',
+                                f'{url}/homework_statuses/')
+            monkeypatch.setattr(homework, 'TELEGRAM_API_URL', url)
+            monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', 'TOKEN')
+            monkeypatch.setattr(homework, 'response_cache',
+                                homework.ResponseCache())
+            tenant = homework.Tenant('token', 42)
+            semaphore = asyncio.Semaphore(2)
+            try:
+                async with aiohttp.ClientSession() as session:
+                    await async_homework.poll_tenant_async(
+                        session, semaphore, tenant
+                    )
+            finally:
+                await runner.cleanup()
+            return tenant
+
+        tenant = asyncio.run(scenario())
+        assert len(sent) == 1, (
+            'Проверьте, что асинхронный опрос отправляет сообщение '
+            'о новом статусе'
+        )
+        assert sent[0]['chat_id'] == 42
+        assert tenant.current_date == random_timestamp
+
+    def test_get_api_answer_async_500(self, monkeypatch):
+        import async_homework
+        import homework
+        from exceptions import UnavailabilityEndpoint
+
+        async def statuses(request):
+            return web.json_response({}, status=500)
+
+        async def scenario():
+            runner, url = await _serve([
+                web.get('/homework_statuses/', statuses),
+            ])
+            monkeypatch.setattr(homework, 'ENDPOINT',
+                                f'{url}/homework_statuses/')
+            try:
+                async with aiohttp.ClientSession() as session:
+                    await async_homework.get_api_answer_async(
+                        session, asyncio.Semaphore(1), {}, 1
+                    )
+            finally:
+                await runner.cleanup()
+
+        with pytest.raises(UnavailabilityEndpoint):
+            asyncio.run(scenario())
+
+    def test_ingest_loop(self, monkeypatch):
+        import async_homework
+        import homework
+        import webhook
+
+        sent = []
+        delivered = asyncio.Event()
+
+        async def send(session, semaphore, chat_id, message):
+            sent.append((chat_id, message))
+            delivered.set()
+
+        monkeypatch.setattr(async_homework, 'send_message_async', send)
+        tenant = homework.Tenant('token', 42, current_date=1581604800)
+        inbox = webhook.Inbox()
+        inbox.put('42', [{
+            'id': 1,
+            'homework_name': 'hw123',
+            'status': 'approved',
+            'date_updated': '2020-02-13T14:40:57Z',
+        }])
+
+        async def scenario():
+            task = asyncio.create_task(async_homework.ingest_loop(
+                None, asyncio.Semaphore(1), [tenant], inbox
+            ))
+            try:
+                await asyncio.wait_for(delivered.wait(), 5)
+            finally:
+                task.cancel()
+
+        asyncio.run(scenario())
+        assert len(sent) == 1, (
+            'Проверьте, что событие приёмника отправляется в асинхронном '
+            'режиме'
+        )
+        assert sent[0][0] == 42
+
+    def test_tenant_loop_waits_for_first_poll(self, monkeypatch):
+        import time
+
+        import async_homework
+        import homework
+        import scheduler
+
+        polled = {}
+
+        async def poll(session, semaphore, tenant, *args):
+            polled[tenant.tenant_id] = time.monotonic()
+            tenant.next_poll = time.monotonic() + 60
+
+        monkeypatch.setattr(async_homework, 'poll_tenant_async', poll)
+        tenants = [homework.Tenant('token', chat_id) for chat_id in range(2)]
+        scheduler.spread_polls(tenants, 0.4)
+
+        async def scenario():
+            tasks = [
+                asyncio.create_task(async_homework.tenant_loop(
+                    None, asyncio.Semaphore(1), tenant
+                ))
+                for tenant in tenants
+            ]
+            await asyncio.sleep(0.1)
+            early = dict(polled)
+            await asyncio.sleep(0.3)
+            for task in tasks:
+                task.cancel()
+            return early
+
+        early = asyncio.run(scenario())
+        assert list(early) == ['0'], (
+            'Проверьте, что первый опрос ждёт времени из STARTUP_SPREAD'
+        )
+        assert '1' in polled
+
+    def test_send_message_async_retry_after(self, monkeypatch):
+        import async_homework
+        import delivery
+        import homework
+        from exceptions import SendMessageTelegramError
+
+        async def send(request):
+            return web.json_response({
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests',
+                'parameters': {'retry_after': 3},
+            }, status=429)
+
+        async def scenario():
+            runner, url = await _serve([
+                web.post('/botTOKEN/sendMessage', send),
+            ])
+            monkeypatch.setattr(homework, 'TELEGRAM_API_URL', url)
+            monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', 'TOKEN')
+            try:
+                async with aiohttp.ClientSession() as session:
+                    await async_homework.send_message_async(
+                        session, asyncio.Semaphore(1), 42, 'message'
+                    )
+            finally:
+                await runner.cleanup()
+
+        with pytest.raises(SendMessageTelegramError) as error:
+            asyncio.run(scenario())
+        assert delivery.retry_after(error.value) == 3, (
+            'Проверьте, что пауза из ответа 429 передаётся очереди отправки'
+        )
+
+    def test_async_delivery_is_limited(self, monkeypatch):
+        import async_homework
+
+        sent = []
+
+        async def send(session, semaphore, chat_id, message):
+            sent.append((chat_id, message))
+
+        monkeypatch.setattr(async_homework, 'send_message_async', send)
+
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            queue = async_homework.create_delivery_async(
+                None, asyncio.Semaphore(1), loop
+            )
+            queue.put(42, 'first')
+            queue.put(42, 'second')
+            await loop.run_in_executor(None, queue.drain_once)
+            queue.put(42, 'third')
+            wait = await loop.run_in_executor(None, queue.drain_once)
+            return wait
+
+        wait = asyncio.run(scenario())
+        assert sent == [(42, 'first\n\nsecond')], (
+            'Проверьте, что в асинхронном режиме сообщения идут через '
+            'очередь с ограничением частоты'
+        )
+        assert wait > 0
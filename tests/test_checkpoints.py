@@ -0,0 +1,114 @@
+import pytest
+
+
+@pytest.fixture(params=['sqlite', 'file'])
+def backend(request):
+    return request.param
+
+
+class TestCheckpoints:
+
+    def test_roundtrip(self, tmp_path, backend, random_timestamp):
+        import checkpoints
+
+        path = str(tmp_path / 'checkpoints')
+        store = checkpoints.create_checkpoint_store(backend, path)
+        store.save('42', {'current_date': random_timestamp,
+                          'seen': {'1': '2020-02-13T14:40:57Z'}})
+        store.save('42', {'current_date': random_timestamp + 1,
+                          'seen': {'1': '2020-02-13T14:40:57Z'}})
+        store.close()
+
+        store = checkpoints.create_checkpoint_store(backend, path)
+        states = store.load()
+        store.close()
+        assert states == {'42': {'current_date': random_timestamp + 1,
+                                 'seen': {'1': '2020-02-13T14:40:57Z'}}}, (
+            'Проверьте, что после перезапуска читается последнее состояние'
+        )
+
+    def test_batched_writes(self, tmp_path, backend):
+        import checkpoints
+
+        path = str(tmp_path / 'checkpoints')
+        store = checkpoints.create_checkpoint_store(
+            backend, path, sync_every=3, sync_interval=3600
+        )
+        store.save('1', {'current_date': 1})
+        store.save('2', {'current_date': 2})
+        assert len(store.pending) == 2, (
+            'Проверьте, что записи копятся до достижения sync_every'
+        )
+        store.save('3', {'current_date': 3})
+        assert not store.pending
+        store.close()
+
+    def test_sync_every_without_interval(self, tmp_path, backend):
+        import checkpoints
+
+        path = str(tmp_path / 'checkpoints')
+        store = checkpoints.create_checkpoint_store(
+            backend, path, sync_every=10
+        )
+        store.save('1', {'current_date': 1})
+        assert len(store.pending) == 1, (
+            'Проверьте, что sync_every работает без sync_interval'
+        )
+        store.close()
+        assert not store.pending
+
+    def test_unknown_backend(self, tmp_path):
+        import checkpoints
+
+        with pytest.raises(ValueError):
+            checkpoints.create_checkpoint_store('redis', str(tmp_path))
+
+    def test_restore_tenants(self, tmp_path, random_timestamp):
+        import checkpoints
+        import homework
+
+        store = checkpoints.create_checkpoint_store(
+            'sqlite', str(tmp_path / 'checkpoints.db')
+        )
+        store.save('42', {'current_date': random_timestamp,
+                          'seen': {'1': ['approved', 1581604857]}})
+        tenants = [homework.Tenant('token', 42), homework.Tenant('token', 7)]
+        homework.restore_tenants(tenants, store)
+        store.close()
+        assert tenants[0].current_date == random_timestamp
+        assert tenants[0].seen == {'1': homework.pack_homework(0, 1581604857)}
+        assert tenants[0].checkpoint(homework.STATUSES)['seen'] == {
+            '1': ['approved', 1581604857]
+        }
+        assert tenants[1].seen == {}
+
+    def test_checkpoint_waits_for_delivery(self, tmp_path):
+        import checkpoints
+        import homework
+
+        store = checkpoints.create_checkpoint_store(
+            'sqlite', str(tmp_path / 'checkpoints.db')
+        )
+        sent = checkpoints.SentCheckpoints(store)
+        queued = []
+        tenant = homework.Tenant('token', 42)
+        homework.process_response(
+            lambda chat_id, message, key=None: queued.append(key),
+            tenant,
+            {'current_date': 1581604860, 'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+                 'date_updated': '2020-02-13T14:40:57Z'},
+            ]},
+            sent,
+        )
+        sent.apply()
+        assert store.load() == {}, (
+            'Проверьте, что контрольная точка не опережает отправку '
+            'сообщения'
+        )
+        sent.mark_sent(queued)
+        sent.apply()
+        assert store.load()['42']['seen'] == {
+            '1': ['approved', 1581604857]
+        }
+        store.close()
@@ -0,0 +1,122 @@
+import pytest
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def breaker(self, clock):
+        import circuit_breaker
+
+        return circuit_breaker.CircuitBreaker(
+            'test', failure_threshold=3, reset_timeout=30, probes=2,
+            clock=clock
+        )
+
+    def test_opens_after_threshold(self, breaker):
+        import metrics
+
+        for _ in range(2):
+            breaker.record_failure()
+        breaker.record_success()
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.allow(), (
+            'Проверьте, что успешный запрос сбрасывает счётчик сбоев'
+        )
+        breaker.record_failure()
+        assert breaker.state == 'open'
+        assert not breaker.allow(), (
+            'Проверьте, что разомкнутая цепь отклоняет запросы'
+        )
+        assert metrics.CIRCUIT_STATE.get('test') == 2
+        assert metrics.CIRCUIT_REJECTED.get('test') >= 1
+
+    def test_half_open_probes(self, breaker, clock):
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now = 10
+        assert breaker.retry_in() == 20
+        clock.now = 30
+        assert [breaker.allow() for _ in range(3)] == [True, True, False], (
+            'Проверьте, что после паузы пропускается ограниченное число проб'
+        )
+        breaker.record_success()
+        assert breaker.state == 'closed'
+        assert breaker.allow()
+
+    def test_failed_probe_reopens(self, breaker, clock):
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now = 30
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == 'open'
+        assert not breaker.allow()
+
+    def test_breaker_per_endpoint(self):
+        import circuit_breaker
+
+        first = circuit_breaker.breaker_for('http://a/')
+        assert circuit_breaker.breaker_for('http://a/') is first
+        assert circuit_breaker.breaker_for('http://b/') is not first
+
+
+class TestPollTenantCircuit:
+
+    def test_outage_short_circuits_polls(self, monkeypatch):
+        import circuit_breaker
+        import homework
+        from exceptions import UnavailabilityEndpoint
+
+        breaker = circuit_breaker.CircuitBreaker(
+            'poll', failure_threshold=2, reset_timeout=60
+        )
+        monkeypatch.setattr(homework, 'api_breaker', breaker)
+        monkeypatch.setattr(homework, 'response_cache',
+                            homework.ResponseCache())
+        calls = []
+
+        def fetch(headers, timestamp, deadline=None):
+            calls.append(timestamp)
+            raise UnavailabilityEndpoint('500', status_code=500)
+
+        monkeypatch.setattr(homework, 'fetch_homework_statuses', fetch)
+        tenants = [homework.Tenant('token', number) for number in range(5)]
+        for tenant in tenants:
+            homework.poll_tenant(lambda *args: None, tenant)
+        assert len(calls) == 2, (
+            'Проверьте, что при разомкнутой цепи API не опрашивается'
+        )
+        assert all(tenant.next_poll > homework.time.monotonic() + 50
+                   for tenant in tenants[2:])
+
+    def test_tenant_errors_keep_circuit_closed(self, monkeypatch):
+        import circuit_breaker
+        import homework
+        from exceptions import UnavailabilityEndpoint
+
+        breaker = circuit_breaker.CircuitBreaker('tenant',
+                                                 failure_threshold=1)
+        monkeypatch.setattr(homework, 'api_breaker', breaker)
+
+        def fetch(headers, timestamp, deadline=None):
+            raise UnavailabilityEndpoint('401', status_code=401)
+
+        monkeypatch.setattr(homework, 'fetch_homework_statuses', fetch)
+        homework.poll_tenant(lambda *args: None, homework.Tenant('token', 1))
+        assert breaker.state == 'closed', (
+            'Проверьте, что ошибка одной подписки не размыкает цепь'
+        )
@@ -0,0 +1,155 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline:
+
+    def test_timeout_is_clipped(self):
+        import deadline
+
+        clock = FakeClock()
+        cycle = deadline.Deadline(30, clock)
+        assert cycle.timeout(3, 10) == (3, 10)
+        clock.now = 25
+        assert cycle.timeout(3, 10) == (3, 5), (
+            'Проверьте, что таймауты не выходят за срок цикла'
+        )
+
+    def test_expired_deadline_raises(self):
+        import deadline
+        from exceptions import DeadlineExceeded
+
+        clock = FakeClock()
+        cycle = deadline.Deadline(30, clock)
+        cycle.check('запрос')
+        clock.now = 30
+        assert cycle.expired
+        with pytest.raises(DeadlineExceeded):
+            cycle.timeout(3, 10)
+
+    def test_request_has_timeout(self, monkeypatch):
+        import homework
+
+        calls = []
+
+        def get(*args, **kwargs):
+            calls.append(kwargs)
+            raise requests.ConnectionError('нет сети')
+
+        monkeypatch.setattr(requests, 'get', get)
+        with pytest.raises(homework.RequestFailureEndpoint):
+            homework.get_api_answer(0)
+        assert calls[0]['timeout'] == (homework.HTTP_CONNECT_TIMEOUT,
+                                       homework.HTTP_READ_TIMEOUT), (
+            'Проверьте, что запрос к API выполняется с таймаутами'
+        )
+
+
+class TestCycleDeadline:
+
+    def test_overrun_is_recorded(self, monkeypatch):
+        import circuit_breaker
+        import homework
+        import metrics
+
+        monkeypatch.setattr(homework, 'api_breaker',
+                            circuit_breaker.CircuitBreaker('deadline'))
+        monkeypatch.setattr(homework, 'CYCLE_DEADLINE', 0.05)
+
+        def get(*args, **kwargs):
+            assert kwargs['timeout'][1] <= 0.05
+            time.sleep(kwargs['timeout'][1])
+            raise requests.ReadTimeout('долгий ответ')
+
+        monkeypatch.setattr(requests, 'get', get)
+        overruns = metrics.CYCLE_OVERRUNS.get()
+        sent = []
+        homework.poll_tenant(lambda chat_id, text, key=None: sent.append(text),
+                             homework.Tenant('token', 1))
+        assert metrics.CYCLE_OVERRUNS.get() == overruns + 1, (
+            'Проверьте, что прерванный по сроку цикл учитывается в метриках'
+        )
+        assert 'DeadlineExceeded' in sent[0]
+
+    def test_async_cycle_is_cancelled(self, monkeypatch):
+        pytest.importorskip('aiohttp')
+        import async_homework
+        import circuit_breaker
+        import homework
+        import metrics
+
+        breaker = circuit_breaker.CircuitBreaker('deadline-async')
+        monkeypatch.setattr(homework, 'api_breaker', breaker)
+        monkeypatch.setattr(homework, 'CYCLE_DEADLINE', 0.05)
+        sent = []
+
+        async def request(*args):
+            await asyncio.sleep(10)
+
+        async def send(session, semaphore, chat_id, message):
+            sent.append(message)
+
+        monkeypatch.setattr(async_homework, 'request_statuses_async', request)
+        monkeypatch.setattr(async_homework, 'send_message_async', send)
+        overruns = metrics.CYCLE_OVERRUNS.get()
+        tenant = homework.Tenant('token', 1)
+        asyncio.run(asyncio.wait_for(
+            async_homework.poll_tenant_async(
+                None, asyncio.Semaphore(1), tenant
+            ),
+            1
+        ))
+        assert metrics.CYCLE_OVERRUNS.get() == overruns + 1, (
+            'Проверьте, что зависший цикл отменяется по сроку'
+        )
+        assert breaker.failures == 1
+        assert len(sent) == 1
+
+    def test_async_semaphore_wait_is_not_overrun(self, monkeypatch):
+        pytest.importorskip('aiohttp')
+        import async_homework
+        import circuit_breaker
+        import homework
+        import metrics
+
+        breaker = circuit_breaker.CircuitBreaker('deadline-semaphore')
+        monkeypatch.setattr(homework, 'api_breaker', breaker)
+        monkeypatch.setattr(homework, 'response_cache',
+                            homework.ResponseCache())
+        monkeypatch.setattr(homework, 'CYCLE_DEADLINE', 0.1)
+        body = b'{"homeworks": [], "current_date": 1}'
+
+        async def request(*args):
+            await asyncio.sleep(0.05)
+            return 200, {}, body
+
+        monkeypatch.setattr(async_homework, 'request_statuses_async', request)
+        overruns = metrics.CYCLE_OVERRUNS.get()
+        tenants = [homework.Tenant('token', chat_id) for chat_id in range(4)]
+
+        async def poll_all():
+            semaphore = asyncio.Semaphore(1)
+            await asyncio.gather(*(
+                async_homework.poll_tenant_async(None, semaphore, tenant)
+                for tenant in tenants
+            ))
+
+        asyncio.run(poll_all())
+        assert metrics.CYCLE_OVERRUNS.get() == overruns, (
+            'Проверьте, что ожидание места в семафоре не входит в срок '
+            'запроса'
+        )
+        assert breaker.failures == 0
+        assert all(tenant.current_date == 1 for tenant in tenants)
@@ -0,0 +1,144 @@
+import time
+
+import pytest
+import telegram
+
+
+class RetryAfter(Exception):
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+
+
+class TestDelivery:
+
+    def test_coalesce_same_chat(self):
+        import delivery
+
+        sent = []
+        queue = delivery.DeliveryQueue(
+            lambda chat_id, text: sent.append((chat_id, text))
+        )
+        queue.put(1, 'first')
+        queue.put(1, 'second')
+        queue.put(2, 'other')
+        queue.drain_once()
+        assert sent == [(1, 'first\n\nsecond'), (2, 'other')], (
+            'Проверьте, что сообщения в один чат объединяются'
+        )
+        assert len(queue) == 0
+
+    def test_chat_rate_limit(self):
+        import delivery
+
+        sent = []
+        queue = delivery.DeliveryQueue(
+            lambda chat_id, text: sent.append(text), chat_rate=1.0
+        )
+        queue.put(1, 'first')
+        queue.drain_once()
+        queue.put(1, 'second')
+        wait = queue.drain_once()
+        assert sent == ['first'], (
+            'Проверьте, что в один чат уходит не больше сообщения в секунду'
+        )
+        assert 0 < wait <= 1
+
+    def test_global_rate_limit(self):
+        import delivery
+
+        sent = []
+        queue = delivery.DeliveryQueue(
+            lambda chat_id, text: sent.append(chat_id), global_rate=2
+        )
+        for chat_id in range(5):
+            queue.put(chat_id, 'message')
+        queue.drain_once()
+        assert len(sent) == 2
+        assert len(queue) == 3
+
+    def test_retry_after(self):
+        import delivery
+        from exceptions import SendMessageTelegramError
+
+        attempts = []
+
+        def send(chat_id, text):
+            attempts.append(text)
+            if len(attempts) == 1:
+                raise SendMessageTelegramError('flood') from RetryAfter(5)
+
+        queue = delivery.DeliveryQueue(send)
+        queue.put(1, 'message')
+        wait = queue.drain_once()
+        assert len(queue) == 1, (
+            'Проверьте, что после RetryAfter сообщение остаётся в очереди'
+        )
+        assert wait == 0
+        assert queue.drain_once() > 1
+        assert queue.not_before[1] > time.monotonic()
+
+    def test_permanent_error_is_dropped(self):
+        import delivery
+        from exceptions import SendMessageTelegramError
+
+        attempts = []
+        sent_keys = []
+
+        def send(chat_id, text):
+            attempts.append(text)
+            raise SendMessageTelegramError('chat not found', permanent=True)
+
+        queue = delivery.DeliveryQueue(send, on_sent=sent_keys.extend,
+                                       retry_delay=0)
+        queue.put(1, 'message', key='a')
+        queue.drain_once()
+        queue.drain_once()
+        assert len(attempts) == 1, (
+            'Проверьте, что постоянная ошибка отправки не повторяется'
+        )
+        assert len(queue) == 0
+        assert sent_keys == ['a'], (
+            'Проверьте, что сообщение с постоянной ошибкой отмечается '
+            'в журнале исходящих'
+        )
+
+    def test_bad_request_is_permanent(self):
+        import homework
+        from exceptions import SendMessageTelegramError
+
+        class Bot:
+
+            def __init__(self, error):
+                self.error = error
+
+            def send_message(self, chat_id, text, **kwargs):
+                raise self.error
+
+        with pytest.raises(SendMessageTelegramError) as error:
+            homework.send_message_to(
+                Bot(telegram.error.BadRequest('Chat not found')), 1, 'text'
+            )
+        assert error.value.permanent
+        with pytest.raises(SendMessageTelegramError) as error:
+            homework.send_message_to(
+                Bot(telegram.error.TimedOut()), 1, 'text'
+            )
+        assert not error.value.permanent, (
+            'Проверьте, что сетевые ошибки повторяются'
+        )
+
+    def test_background_thread(self):
+        import delivery
+
+        sent = []
+        queue = delivery.DeliveryQueue(
+            lambda chat_id, text: sent.append(text)
+        )
+        queue.start()
+        queue.put(1, 'message')
+        deadline = time.monotonic() + 2
+        while not sent and time.monotonic() < deadline:
+            time.sleep(0.01)
+        queue.stop()
+        assert sent == ['message']
@@ -0,0 +1,149 @@
+from http import HTTPStatus
+
+import pytest
+
+
+class MockResponse:
+
+    def __init__(self, content=b'', status_code=HTTPStatus.OK):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = content
+
+
+class TestErrorDeduplicator:
+
+    @pytest.fixture
+    def deduplicator(self):
+        import error_dedup
+
+        return error_dedup.ErrorDeduplicator(window=60, max_errors=2)
+
+    def test_fingerprint_ignores_numbers(self):
+        import error_dedup
+        from exceptions import RequestFailureEndpoint, UnavailabilityEndpoint
+
+        first = error_dedup.error_fingerprint(
+            UnavailabilityEndpoint('Статус-код 500, from_date 1000198000')
+        )
+        second = error_dedup.error_fingerprint(
+            UnavailabilityEndpoint('Статус-код  502, from_date 1000198991')
+        )
+        assert first == second, (
+            'Проверьте, что числа в тексте не влияют на отпечаток ошибки'
+        )
+        other = error_dedup.error_fingerprint(
+            RequestFailureEndpoint('Статус-код 500, from_date 1000198000')
+        )
+        assert other != first, (
+            'Проверьте, что в отпечаток входит класс исключения'
+        )
+
+    def test_alternating_errors_are_silenced(self, deduplicator):
+        from exceptions import RequestFailureEndpoint, UnavailabilityEndpoint
+
+        errors = {}
+        sent = [
+            deduplicator.should_notify(errors, error, now)
+            for now, error in enumerate([
+                RequestFailureEndpoint('timeout'),
+                UnavailabilityEndpoint('500'),
+                RequestFailureEndpoint('timeout'),
+                UnavailabilityEndpoint('500'),
+            ])
+        ]
+        assert sent == [True, True, False, False], (
+            'Проверьте, что чередующиеся ошибки не отправляются повторно'
+        )
+
+    def test_window_expires(self, deduplicator):
+        errors = {}
+        assert deduplicator.should_notify(errors, KeyError('a'), 0)
+        assert not deduplicator.should_notify(errors, KeyError('a'), 59)
+        assert deduplicator.should_notify(errors, KeyError('a'), 60), (
+            'Проверьте, что после окна тишины об ошибке сообщается снова'
+        )
+
+    def test_memory_is_bounded(self, deduplicator):
+        errors = {}
+        for now, text in enumerate('abc'):
+            deduplicator.should_notify(errors, KeyError(text), now)
+        assert len(errors) == 2, (
+            'Проверьте, что для подписки хранится ограниченное число ошибок'
+        )
+        assert deduplicator.should_notify(errors, KeyError('a'), 3)
+
+
+class TestPollTenantErrors:
+
+    def test_recovery_message(self, monkeypatch):
+        import circuit_breaker
+        import homework
+        from exceptions import RequestFailureEndpoint, UnavailabilityEndpoint
+
+        monkeypatch.setattr(homework, 'response_cache',
+                            homework.ResponseCache())
+        monkeypatch.setattr(homework, 'api_breaker',
+                            circuit_breaker.CircuitBreaker('dedup'))
+        answers = [
+            RequestFailureEndpoint('timeout'),
+            UnavailabilityEndpoint('500'),
+            RequestFailureEndpoint('timeout'),
+            MockResponse(b'{"homeworks": [], "current_date": 1000198000}'),
+            MockResponse(status_code=HTTPStatus.NOT_MODIFIED),
+        ]
+
+        def fetch(headers, timestamp, deadline=None):
+            answer = answers.pop(0)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        monkeypatch.setattr(homework, 'fetch_homework_statuses', fetch)
+        sent = []
+        tenant = homework.Tenant('token', 42)
+        for _ in range(5):
+            homework.poll_tenant(
+                lambda chat_id, text, key=None: sent.append(text), tenant
+            )
+        assert len(sent) == 3, (
+            'Проверьте, что о каждой ошибке сообщается один раз, '
+            'а после восстановления приходит одно сообщение'
+        )
+        assert sent[-1] == homework.RECOVERED_MESSAGE
+        assert not tenant.outage
+
+    def test_flapping_error(self, monkeypatch):
+        import circuit_breaker
+        import homework
+        from exceptions import RequestFailureEndpoint
+
+        monkeypatch.setattr(homework, 'response_cache',
+                            homework.ResponseCache())
+        monkeypatch.setattr(homework, 'api_breaker',
+                            circuit_breaker.CircuitBreaker('flapping'))
+        answers = []
+        for number in range(3):
+            answers.append(RequestFailureEndpoint('timeout'))
+            answers.append(MockResponse(
+                b'{"homeworks": [], "current_date": %d}' % (1000 + number)
+            ))
+
+        def fetch(headers, timestamp, deadline=None):
+            answer = answers.pop(0)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        monkeypatch.setattr(homework, 'fetch_homework_statuses', fetch)
+        sent = []
+        tenant = homework.Tenant('token', 42)
+        for _ in range(6):
+            homework.poll_tenant(
+                lambda chat_id, text, key=None: sent.append(text), tenant
+            )
+        assert len(sent) == 2, (
+            'Проверьте, что сбой, чередующийся с успешными опросами, '
+            'не повторяет сообщения о сбое и восстановлении'
+        )
+        assert sent[1] == homework.RECOVERED_MESSAGE
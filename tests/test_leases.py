@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+
+@pytest.fixture(params=['sqlite', 'file'])
+def backend(request):
+    return request.param
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'leases')
+
+
+class TestLeases:
+
+    def test_single_holder(self, path, backend):
+        import leases
+
+        first = leases.create_lease_store(backend, path, owner='first')
+        second = leases.create_lease_store(backend, path, owner='second')
+        assert first.acquire('42')
+        assert first.acquire('42'), (
+            'Проверьте, что держатель продлевает аренду'
+        )
+        assert not second.acquire('42'), (
+            'Проверьте, что подписку не может взять вторая реплика'
+        )
+        assert second.acquire('43')
+        first.close()
+        assert second.acquire('42'), (
+            'Проверьте, что отпущенную аренду сразу берёт другая реплика'
+        )
+        second.close()
+
+    def test_sqlite_lease_expires(self, path, monkeypatch):
+        import leases
+
+        first = leases.SQLiteLeaseStore(path, ttl=30, owner='first')
+        second = leases.SQLiteLeaseStore(path, ttl=30, owner='second')
+        assert first.acquire('42')
+        now = time.time()
+        monkeypatch.setattr(leases.time, 'time', lambda: now + 31)
+        assert second.acquire('42'), (
+            'Проверьте, что аренда истекает, если её не продлевают'
+        )
+        assert not first.acquire('42')
+        assert '42' not in first.held
+
+    def test_sqlite_renew_detects_loss(self, path, monkeypatch):
+        import leases
+
+        first = leases.SQLiteLeaseStore(path, ttl=30, owner='first')
+        second = leases.SQLiteLeaseStore(path, ttl=30, owner='second')
+        first.acquire('1')
+        first.acquire('2')
+        now = time.time()
+        monkeypatch.setattr(leases.time, 'time', lambda: now + 31)
+        second.acquire('2')
+        first.renew()
+        assert first.held == {'1'}, (
+            'Проверьте, что при продлении выясняется, какие аренды потеряны'
+        )
+
+    def test_unknown_backend(self, path):
+        import leases
+
+        with pytest.raises(ValueError):
+            leases.create_lease_store('redis', path)
+
+
+class TestClaimTenant:
+
+    def test_without_leases(self):
+        import homework
+        from tenants import Tenant
+
+        assert homework.claim_tenant(Tenant('token', 1), None)
+
+    def test_busy_tenant_is_postponed(self, path):
+        import homework
+        import leases
+        from tenants import Tenant
+
+        holder = leases.SQLiteLeaseStore(path, owner='first')
+        standby = leases.SQLiteLeaseStore(path, owner='second')
+        tenant = Tenant('token', 1)
+        assert homework.claim_tenant(tenant, holder)
+        assert not homework.claim_tenant(tenant, standby)
+        assert tenant.next_poll > time.monotonic() + standby.ttl / 2, (
+            'Проверьте, что подписка без аренды откладывается'
+        )
+
+    def test_takeover_restores_state(self, tmp_path, path):
+        import checkpoints
+        import homework
+        import leases
+        from tenants import Tenant
+
+        store = checkpoints.SQLiteCheckpointStore(str(tmp_path / 'db'))
+        store.save('1', {'current_date': 100, 'seen': {}})
+        tenant = Tenant('token', 1, current_date=1)
+        standby = leases.SQLiteLeaseStore(path, owner='second')
+        assert homework.claim_tenant(tenant, standby, store)
+        assert tenant.current_date == 100, (
+            'Проверьте, что перешедшая подписка восстанавливается из '
+            'контрольной точки'
+        )
+
+    def test_file_checkpoints_rejected(self, monkeypatch):
+        import homework
+
+        monkeypatch.setattr(homework, 'LEASE_BACKEND', 'sqlite')
+        monkeypatch.setattr(homework, 'CHECKPOINT_BACKEND', 'file')
+        assert homework.SHARED_CHECKPOINT_MESSAGE in homework.check_config(), (
+            'Проверьте, что аренда с файловыми контрольными точками '
+            'отклоняется'
+        )
+        with pytest.raises(ValueError):
+            homework.get_lease_store()
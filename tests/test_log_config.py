@@ -0,0 +1,75 @@
+import json
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+class TestLogConfig:
+
+    def test_json_output(self, capsys, root_logger):
+        import log_config
+
+        listener = log_config.configure_logging('INFO', json_output=True)
+        logging.getLogger('homework').info('Загружено подписок: %d', 3)
+        logging.getLogger('homework').debug('Не попадёт в журнал')
+        listener.stop()
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 1, (
+            'Проверьте, что записи ниже заданного уровня отбрасываются'
+        )
+        record = json.loads(lines[0])
+        assert record['message'] == 'Загружено подписок: 3'
+        assert record['level'] == 'INFO'
+        assert record['logger'] == 'homework'
+
+    def test_text_output(self, capsys, root_logger):
+        import log_config
+
+        listener = log_config.configure_logging()
+        logging.getLogger('homework').debug('Сообщение %s', 'ok')
+        listener.stop()
+        assert ' - DEBUG - Сообщение ok' in capsys.readouterr().out
+
+    def test_third_party_debug_hidden(self, capsys, root_logger):
+        import log_config
+
+        listener = log_config.configure_logging()
+        logging.getLogger('telegram.bot').debug('Entering: send_message')
+        logging.getLogger('urllib3.connectionpool').debug('Starting new')
+        logging.getLogger('telegram.bot').warning('Предупреждение')
+        listener.stop()
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 1, (
+            'Проверьте, что отладочные записи библиотек не попадают в журнал'
+        )
+        assert 'Предупреждение' in lines[0]
+
+    def test_formatting_deferred(self):
+        import log_config
+
+        class Argument:
+            formatted = False
+
+            def __str__(self):
+                Argument.formatted = True
+                return 'argument'
+
+        records = []
+        handler = log_config.LazyQueueHandler(records)
+        handler.enqueue = records.append
+        handler.emit(logging.makeLogRecord(
+            {'msg': 'Сообщение %s', 'args': (Argument(),)}
+        ))
+        assert records and not Argument.formatted, (
+            'Проверьте, что сообщение форматируется в потоке журнала, '
+            'а не в потоке опроса'
+        )
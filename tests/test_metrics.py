@@ -0,0 +1,53 @@
+import urllib.request
+
+import pytest
+
+
+class TestMetrics:
+
+    def test_counter_and_histogram(self):
+        import metrics
+
+        counter = metrics.Counter('test_total', 'Тестовый счётчик', ('code',))
+        counter.inc(200)
+        counter.inc(200, amount=2)
+        histogram = metrics.Histogram(
+            'test_seconds', 'Тестовая гистограмма', buckets=(0.1, 1.0)
+        )
+        histogram.observe(0.05)
+        histogram.observe(5)
+        assert counter.get(200) == 3
+        text = metrics.render()
+        assert 'test_total{code="200"} 3' in text
+        assert 'test_seconds_bucket{le="0.1"} 1' in text
+        assert 'test_seconds_bucket{le="+Inf"} 2' in text
+        assert 'test_seconds_count 2' in text
+        with pytest.raises(ValueError):
+            counter.inc()
+
+    def test_check_response_failures(self):
+        import homework
+        import metrics
+
+        before = metrics.CHECK_FAILURES.get('KeyError')
+        tenant = homework.Tenant('token', 42)
+        with pytest.raises(KeyError):
+            homework.collect_updates(tenant, {})
+        assert metrics.CHECK_FAILURES.get('KeyError') == before + 1, (
+            'Проверьте, что ошибки check_response учитываются по типу'
+        )
+
+    def test_metrics_endpoint(self):
+        import metrics
+
+        server = metrics.start_metrics_server(0, '127.0.0.1')
+        port = server.server_address[1]
+        try:
+            with urllib.request.urlopen(
+                f'http://127.0.0.1:{port}/metrics'
+            ) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert '# TYPE homework_api_request_seconds histogram' in body
@@ -0,0 +1,219 @@
+import time
+
+import pytest
+
+
+class TestOutbox:
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / 'outbox.log')
+
+    def test_commit_then_deliver(self, path):
+        import outbox
+
+        delivered = []
+        log = outbox.Outbox(
+            path, lambda chat_id, text, key: delivered.append(key)
+        )
+        log.append(1, 'first', 'a')
+        log.append(1, 'second', 'b')
+        assert delivered == [], (
+            'Проверьте, что сообщение уходит на доставку только после '
+            'записи в журнал'
+        )
+        log.commit()
+        assert delivered == ['a', 'b']
+        log.close()
+
+    def test_group_commit_single_fsync(self, path, monkeypatch):
+        import outbox
+
+        syncs = []
+        monkeypatch.setattr(outbox.os, 'fsync', syncs.append)
+        log = outbox.Outbox(path, lambda *args: None)
+        syncs.clear()
+        for number in range(100):
+            log.append(1, 'message', str(number))
+        log.commit()
+        assert len(syncs) == 1, (
+            'Проверьте, что группа записей сбрасывается одним fsync'
+        )
+        log.mark_done(['1', '2'])
+        log.commit()
+        assert len(syncs) == 1, (
+            'Проверьте, что отметки о доставке не требуют fsync'
+        )
+        log.close()
+
+    def test_idempotency_keys(self, path):
+        import outbox
+
+        delivered = []
+        log = outbox.Outbox(
+            path, lambda chat_id, text, key: delivered.append(key)
+        )
+        log.append(1, 'message', 'a')
+        log.append(1, 'message', 'a')
+        log.commit()
+        log.mark_done(['a'])
+        log.append(1, 'message', 'a')
+        log.commit()
+        assert delivered == ['a'], (
+            'Проверьте, что сообщение с тем же ключом не ставится повторно'
+        )
+        log.close()
+
+    def test_replay_after_restart(self, path):
+        import outbox
+
+        log = outbox.Outbox(path, lambda *args: None)
+        log.append(1, 'delivered', 'a')
+        log.append(2, 'lost', 'b')
+        log.commit()
+        log.mark_done(['a'])
+        log.close()
+
+        delivered = []
+        log = outbox.Outbox(
+            path, lambda *args: delivered.append(args)
+        )
+        log.replay()
+        assert delivered == [(2, 'lost', 'b')], (
+            'Проверьте, что после перезапуска доставляются только '
+            'недоставленные сообщения'
+        )
+        log.append(1, 'delivered', 'a')
+        log.commit()
+        assert len(delivered) == 1
+        log.close()
+
+    def test_compaction(self, path):
+        import outbox
+
+        log = outbox.Outbox(path, lambda *args: None, max_done=2,
+                            compact_every=4)
+        for number in range(10):
+            log.append(1, 'message', str(number))
+            log.commit()
+            log.mark_done([str(number)])
+        log.commit()
+        log.close()
+        with open(path, encoding='utf-8') as file:
+            lines = file.readlines()
+        assert len(lines) < 10, 'Проверьте, что журнал сжимается'
+        log = outbox.Outbox(path, lambda *args: None, max_done=2)
+        assert len(log) == 0
+        assert list(log.done) == ['8', '9']
+        log.close()
+
+    def test_single_process_per_log(self, path):
+        import outbox
+
+        log = outbox.Outbox(path, lambda *args: None)
+        with pytest.raises(RuntimeError):
+            outbox.Outbox(path, lambda *args: None)
+        log.close()
+        outbox.Outbox(path, lambda *args: None).close()
+
+    def test_replicas_get_own_logs(self, path, monkeypatch):
+        import homework
+
+        monkeypatch.setattr(homework, 'OUTBOX_PATH', path)
+        monkeypatch.setattr(homework, 'LEASE_BACKEND', 'sqlite')
+        logs = []
+        for replica in ('web.1', 'web.2'):
+            monkeypatch.setattr(homework, 'REPLICA_ID', replica)
+            logs.append(homework.get_outbox())
+        assert [log.path for log in logs] == [
+            f'{path}.web.1', f'{path}.web.2'
+        ], 'Проверьте, что у каждой реплики свой журнал исходящих'
+        for log in logs:
+            log.close()
+
+    def test_async_mode_rejects_outbox(self, path, monkeypatch):
+        import homework
+
+        monkeypatch.setattr(homework, 'OUTBOX_PATH', path)
+        monkeypatch.setattr(homework, 'ASYNC_MODE', True)
+        assert homework.ASYNC_OUTBOX_MESSAGE in homework.check_config(), (
+            'Проверьте, что журнал исходящих в асинхронном режиме '
+            'отклоняется'
+        )
+
+    def test_message_without_key_skips_log(self, path):
+        import outbox
+
+        delivered = []
+        log = outbox.Outbox(path, lambda *args: delivered.append(args))
+        log.append(1, 'error')
+        assert delivered == [(1, 'error', None)]
+        assert len(log) == 0
+        log.close()
+
+
+class TestDurableDelivery:
+
+    def test_failed_message_is_retried(self):
+        import delivery
+        from exceptions import SendMessageTelegramError
+
+        attempts = []
+        sent_keys = []
+
+        def send(chat_id, text):
+            attempts.append(text)
+            if len(attempts) == 1:
+                raise SendMessageTelegramError('network')
+
+        queue = delivery.DeliveryQueue(send, chat_rate=100,
+                                       on_sent=sent_keys.extend,
+                                       retry_delay=0)
+        queue.put(1, 'message', 'a')
+        queue.drain_once()
+        assert len(queue) == 1, (
+            'Проверьте, что сообщение из журнала не теряется при сбое'
+        )
+        time.sleep(0.05)
+        queue.drain_once()
+        assert sent_keys == ['a']
+        assert len(queue) == 0
+
+
+class TestOutboxPolling:
+
+    def test_wal_before_checkpoint(self, tmp_path):
+        import checkpoints
+        import homework
+        import outbox
+
+        order = []
+        log = outbox.Outbox(str(tmp_path / 'outbox.log'),
+                            lambda *args: order.append('deliver'))
+        store = checkpoints.create_checkpoint_store(
+            'file', str(tmp_path / 'checkpoints')
+        )
+        original_commit = log.commit
+
+        def commit():
+            order.append('commit')
+            original_commit()
+
+        log.commit = commit
+        store.before_flush = log.commit
+        tenant = homework.Tenant('token', 42)
+        homework.process_response(log.append, tenant, {
+            'homeworks': [{
+                'id': 1,
+                'homework_name': 'hw123',
+                'status': 'approved',
+                'date_updated': '2020-02-13T14:40:57Z',
+            }],
+            'current_date': 1581604857,
+        }, store)
+        assert order[:2] == ['commit', 'deliver'], (
+            'Проверьте, что журнал сбрасывается раньше контрольной точки'
+        )
+        assert store.load()['42']['seen']
+        log.close()
+        store.close()
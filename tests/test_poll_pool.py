@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+from http import HTTPStatus
+
+
+class MockResponse:
+
+    def __init__(self, current_date):
+        self.status_code = HTTPStatus.OK
+        self.headers = {}
+        self.content = json.dumps({
+            'homeworks': [], 'current_date': current_date
+        }).encode()
+
+
+def wait_done(pool, count, timeout=5):
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        done = [future for _, future in pool.in_flight.values()
+                if future.done()]
+        if len(done) >= count:
+            return
+        time.sleep(0.01)
+
+
+class TestPollPool:
+
+    def test_in_flight_is_bounded(self):
+        import homework
+        import poll_pool
+
+        release = threading.Event()
+        pool = poll_pool.PollPool(2, max_in_flight=2)
+        tenants = [homework.Tenant('token', chat_id) for chat_id in range(3)]
+        try:
+            assert pool.submit(tenants[0], release.wait)
+            assert not pool.submit(tenants[0], release.wait), (
+                'Проверьте, что у подписки не больше одного запроса в работе'
+            )
+            assert pool.submit(tenants[1], release.wait)
+            assert not pool.submit(tenants[2], release.wait), (
+                'Проверьте, что число запросов в работе ограничено'
+            )
+            assert pool.completed() == []
+            release.set()
+            wait_done(pool, 2)
+            done = pool.completed()
+            assert [tenant for tenant, _ in done] == tenants[:2], (
+                'Проверьте, что результаты забираются в порядке запросов'
+            )
+            assert len(pool) == 0
+        finally:
+            release.set()
+            pool.shutdown()
+
+
+class TestPollPooled:
+
+    def test_responses_applied_in_order(self, monkeypatch):
+        import circuit_breaker
+        import homework
+        import poll_pool
+        import scheduler
+
+        monkeypatch.setattr(homework, 'response_cache',
+                            homework.ResponseCache())
+        monkeypatch.setattr(homework, 'api_breaker',
+                            circuit_breaker.CircuitBreaker('pool'))
+        requested = []
+        release = threading.Event()
+
+        def fetch(headers, timestamp, deadline=None):
+            requested.append(timestamp)
+            release.wait(5)
+            return MockResponse((timestamp or 0) + 100)
+
+        monkeypatch.setattr(homework, 'fetch_homework_statuses', fetch)
+        tenant = homework.Tenant('token', 1, current_date=1000)
+        pool = poll_pool.PollPool(4)
+        queue = scheduler.PollQueue([tenant])
+
+        def poll():
+            homework.poll_pooled(lambda *args: None, queue, pool)
+
+        try:
+            poll()
+            tenant.next_poll = 0
+            poll()
+            assert len(pool) == 1, (
+                'Проверьте, что подписка не опрашивается до разбора ответа'
+            )
+            release.set()
+            wait_done(pool, 1)
+            poll()
+            assert tenant.current_date == 1100
+            tenant.next_poll = 0
+            queue.push(tenant)
+            poll()
+            wait_done(pool, 1)
+            poll()
+        finally:
+            release.set()
+            pool.shutdown()
+        assert requested == [1000, 1100], (
+            'Проверьте, что следующий запрос берёт current_date '
+            'из разобранного ответа'
+        )
+        assert tenant.current_date == 1200
+
+
+class TestParallelDelivery:
+
+    def test_chats_sent_in_parallel(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        import delivery
+
+        barrier = threading.Barrier(2, timeout=5)
+        sent = []
+
+        def send(chat_id, text):
+            barrier.wait()
+            sent.append(chat_id)
+
+        executor = ThreadPoolExecutor(2)
+        queue = delivery.DeliveryQueue(send, executor=executor)
+        queue.put(1, 'first')
+        queue.put(2, 'second')
+        queue.drain_once()
+        executor.shutdown(wait=True)
+        assert sorted(sent) == [1, 2], (
+            'Проверьте, что сообщения в разные чаты отправляются '
+            'параллельно'
+        )
+        assert len(queue) == 0
+        assert queue.sending == set()
@@ -0,0 +1,98 @@
+import json
+from http import HTTPStatus
+
+
+class MockResponse:
+
+    def __init__(self, payload=None, status_code=HTTPStatus.OK, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(payload).encode() if payload else b''
+        self.decoded = 0
+
+    def json(self):
+        self.decoded += 1
+        return json.loads(self.content)
+
+
+class TestResponseCache:
+
+    def test_fingerprint_ignores_current_date(self):
+        import response_cache
+
+        first, date = response_cache.fingerprint(
+            b'{"homeworks": [], "current_date": 1000198000}'
+        )
+        second, _ = response_cache.fingerprint(
+            b'{"homeworks": [], "current_date": 1000198991}'
+        )
+        assert first == second, (
+            'Проверьте, что current_date не влияет на отпечаток ответа'
+        )
+        assert date == 1000198000
+        other, _ = response_cache.fingerprint(
+            b'{"homeworks": [{"id": 1}], "current_date": 1000198000}'
+        )
+        assert other != first
+
+    def test_conditional_headers(self):
+        import response_cache
+
+        cache = response_cache.ResponseCache()
+        assert cache.conditional_headers('42') == {}
+        cache.remember('42', {'ETag': '"abc"'}, b'digest')
+        assert cache.conditional_headers('42') == {'If-None-Match': '"abc"'}
+
+    def test_unchanged_response_skips_decoding(self, monkeypatch):
+        import homework
+
+        monkeypatch.setattr(homework, 'response_cache',
+                            homework.ResponseCache())
+        responses = [
+            MockResponse({'homeworks': [], 'current_date': date})
+            for date in (1000198000, 1000198500)
+        ]
+        monkeypatch.setattr(
+            homework, 'fetch_homework_statuses',
+            lambda headers, timestamp, deadline=None: responses.pop(0)
+        )
+        decoded = []
+        monkeypatch.setattr(
+            homework, 'decode_response',
+            lambda response: decoded.append(response) or response.json()
+        )
+        first, second = responses
+        tenant = homework.Tenant('token', 42)
+        homework.poll_tenant(lambda *args: None, tenant)
+        homework.poll_tenant(lambda *args: None, tenant)
+        assert decoded == [first]
+        assert second.decoded == 0, (
+            'Проверьте, что неизменившийся ответ не разбирается повторно'
+        )
+        assert tenant.current_date == 1000198500, (
+            'Проверьте, что current_date продвигается и без разбора ответа'
+        )
+
+    def test_not_modified(self, monkeypatch):
+        import homework
+
+        monkeypatch.setattr(homework, 'response_cache',
+                            homework.ResponseCache())
+        sent_headers = []
+
+        def fetch(headers, timestamp, deadline=None):
+            sent_headers.append(headers)
+            if len(sent_headers) == 1:
+                return MockResponse(
+                    {'homeworks': [], 'current_date': 1000198000},
+                    headers={'ETag': '"v1"'}
+                )
+            return MockResponse(status_code=HTTPStatus.NOT_MODIFIED)
+
+        monkeypatch.setattr(homework, 'fetch_homework_statuses', fetch)
+        tenant = homework.Tenant('token', 42)
+        homework.poll_tenant(lambda *args: None, tenant)
+        homework.poll_tenant(lambda *args: None, tenant)
+        assert sent_headers[1]['If-None-Match'] == '"v1"'
+        assert tenant.current_date == 1000198000
+        assert tenant.errors is None
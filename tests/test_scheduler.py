@@ -0,0 +1,127 @@
+import pytest
+
+
+class TestAdaptiveSchedule:
+
+    @pytest.fixture
+    def schedule(self):
+        import scheduler
+
+        return scheduler.AdaptiveSchedule(60, 3600, 600, jitter=0.1)
+
+    def test_reviewing_polls_fast(self, schedule):
+        interval = schedule.next_interval(
+            600, [{'homework_name': 'hw', 'status': 'reviewing'}]
+        )
+        assert interval == 60, (
+            'Проверьте, что при статусе reviewing опрос ускоряется'
+        )
+
+    def test_empty_backs_off(self, schedule):
+        interval = 60
+        for _ in range(10):
+            interval = schedule.next_interval(interval, [])
+        assert interval == 3600, (
+            'Проверьте, что без изменений интервал растёт до максимума'
+        )
+
+    def test_known_reviewing_polls_fast(self, schedule):
+        interval = 60
+        for _ in range(3):
+            interval = schedule.next_interval(interval, [], reviewing=True)
+        assert interval == 60, (
+            'Проверьте, что пустые ответы не замедляют опрос, пока '
+            'работа на проверке'
+        )
+        assert schedule.next_interval(60, None, reviewing=True) == 120
+
+    def test_error_backs_off(self, schedule):
+        assert schedule.next_interval(600, None) == 1200
+
+    def test_change_resets_interval(self, schedule):
+        interval = schedule.next_interval(
+            3600, [{'homework_name': 'hw', 'status': 'approved'}]
+        )
+        assert interval == 600
+
+    def test_delay_jitter(self, schedule):
+        delays = {schedule.delay(600) for _ in range(20)}
+        assert all(540 <= delay <= 660 for delay in delays)
+        assert len(delays) > 1, 'Проверьте, что к интервалу добавляется разброс'
+
+    def test_invalid_bounds(self):
+        import scheduler
+
+        with pytest.raises(ValueError):
+            scheduler.AdaptiveSchedule(600, 60, 300)
+
+
+class TestPollQueue:
+
+    @pytest.fixture
+    def tenants(self):
+        import tenants
+
+        result = [tenants.Tenant('token', chat_id) for chat_id in range(5)]
+        for tenant, next_poll in zip(result, [50, 10, 40, 20, 30]):
+            tenant.next_poll = next_poll
+        return result
+
+    def test_pop_due_in_deadline_order(self, tenants):
+        import scheduler
+
+        queue = scheduler.PollQueue(tenants)
+        due = queue.pop_due(30)
+        assert [tenant.chat_id for tenant in due] == [1, 3, 4], (
+            'Проверьте, что подписки достаются по времени опроса'
+        )
+        assert queue.next_deadline() == 40
+        assert queue.pop_due(30) == [], (
+            'Проверьте, что извлечённая подписка не возвращается сама'
+        )
+        due[0].next_poll = 45
+        queue.push(due[0])
+        assert [t.chat_id for t in queue.pop_due(100, limit=2)] == [2, 1]
+
+    def test_postponed_without_push(self, tenants):
+        import scheduler
+
+        queue = scheduler.PollQueue(tenants)
+        tenants[1].next_poll = 35
+        assert [t.chat_id for t in queue.pop_due(30)] == [3, 4], (
+            'Проверьте, что отложенная подписка переставляется в очереди'
+        )
+        assert [t.chat_id for t in queue.pop_due(35)] == [1]
+
+    def test_reschedule_does_not_duplicate(self, tenants):
+        import scheduler
+
+        queue = scheduler.PollQueue(tenants[:1])
+        for next_poll in range(100):
+            tenants[0].next_poll = next_poll
+            queue.push(tenants[0])
+        assert queue.pop_due(1000) == [tenants[0]]
+        assert len(queue.heap) < 100, (
+            'Проверьте, что устаревшие записи вычищаются из кучи'
+        )
+
+    def test_sync(self, tenants):
+        import scheduler
+
+        queue = scheduler.PollQueue(tenants[:3])
+        taken = queue.pop_due(10)
+        queue.sync(tenants[1:])
+        assert len(queue) == 4
+        due = queue.pop_due(100)
+        assert tenants[0] not in due
+        assert taken[0] not in due, (
+            'Проверьте, что подписка в работе не ставится в очередь повторно'
+        )
+
+    def test_spread_polls(self, tenants):
+        import scheduler
+
+        scheduler.spread_polls(tenants, 60, now=100)
+        assert [tenant.next_poll for tenant in tenants] == [
+            100, 112, 124, 136, 148
+        ], 'Проверьте, что первые опросы распределяются равномерно'
@@ -0,0 +1,68 @@
+import pytest
+
+
+class TestSchema:
+
+    @pytest.fixture
+    def validator(self):
+        import homework
+        import schema
+
+        return schema.HomeworkValidator(homework.VERDICTS)
+
+    def test_validate_records(self, validator):
+        records = validator.validate({'homeworks': [
+            {'id': 7, 'homework_name': 'hw1', 'status': 'approved',
+             'date_updated': '2020-02-13T14:40:57Z'},
+            {'homework_name': 'hw2', 'status': 'reviewing',
+             'date_updated': '2020-02-14T14:40:57Z'},
+        ]})
+        assert [record.key for record in records] == ['7', 'hw2']
+        assert records[0].status == 0, (
+            'Проверьте, что статус хранится номером в порядке VERDICTS'
+        )
+        assert records[1].date_updated == 1581691257
+
+    @pytest.mark.parametrize('response, error', [
+        ([], TypeError),
+        ({}, KeyError),
+        ({'homeworks': {}}, 'ObjectNotInstance'),
+        ({'homeworks': [{'status': 'approved',
+                         'date_updated': 'date'}]}, KeyError),
+        ({'homeworks': [{'homework_name': 'hw',
+                         'date_updated': 'date'}]}, KeyError),
+        ({'homeworks': [{'homework_name': 'hw', 'status': 'unknown',
+                         'date_updated': 'date'}]}, 'ErrorValueDictionary'),
+        ({'homeworks': [{'homework_name': 'hw', 'status': 'approved',
+                         'date_updated': 'date'}]}, 'ObjectNotInstance'),
+    ])
+    def test_validate_errors(self, validator, response, error):
+        import exceptions
+
+        if isinstance(error, str):
+            error = getattr(exceptions, error)
+        with pytest.raises(error):
+            validator.validate(response)
+
+    def test_decode_response(self):
+        import schema
+
+        class Response:
+            content = b'{"homeworks": [], "current_date": 1}'
+
+        class MockResponse:
+            def json(self):
+                return {'homeworks': []}
+
+        assert schema.decode_response(Response()) == {
+            'homeworks': [], 'current_date': 1
+        }
+        assert schema.decode_response(MockResponse()) == {'homeworks': []}
+
+    def test_loads_fallback(self, monkeypatch):
+        import schema
+
+        monkeypatch.setattr(schema, 'orjson', None)
+        assert schema.loads(b'{"current_date": 1}') == {'current_date': 1}
+        with pytest.raises(ValueError):
+            schema.loads(b'{')
@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+
+
+class MockSession:
+
+    def __init__(self, status_code=HTTPStatus.OK):
+        self.status_code = status_code
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        self.calls += 1
+        response = self
+
+        class Response:
+            status_code = response.status_code
+            text = ''
+
+            def json(self):
+                return {'homeworks': [], 'current_date': params['from_date']}
+
+        return Response()
+
+
+class TestSession:
+
+    def test_create_session_pool(self):
+        import homework
+
+        http_session = homework.create_session(
+            pool_size=5, retries=2, backoff_factor=0.1
+        )
+        adapter = http_session.get_adapter(homework.ENDPOINT)
+        assert adapter._pool_maxsize == 5, (
+            'Проверьте, что размер пула соединений настраивается'
+        )
+        assert adapter.max_retries.total == 2
+        assert not adapter.max_retries.raise_on_status, (
+            'Статус-код ответа после повторов должен обрабатываться '
+            'в get_api_answer'
+        )
+
+    def test_get_api_answer_uses_session(self, monkeypatch, random_timestamp):
+        import homework
+
+        http_session = MockSession()
+        monkeypatch.setattr(homework, 'session', http_session)
+        result = homework.get_api_answer(random_timestamp)
+        assert http_session.calls == 1, (
+            'Проверьте, что запрос идёт через общую HTTP-сессию'
+        )
+        assert result['current_date'] == random_timestamp
+
+    def test_session_error_mapping(self, monkeypatch, random_timestamp):
+        import homework
+        from exceptions import UnavailabilityEndpoint
+
+        monkeypatch.setattr(
+            homework, 'session',
+            MockSession(HTTPStatus.INTERNAL_SERVER_ERROR)
+        )
+        with pytest.raises(UnavailabilityEndpoint):
+            homework.get_api_answer(random_timestamp)
+
+    def test_retries_stay_within_deadline(self, monkeypatch):
+        import deadline
+        import homework
+        from exceptions import UnavailabilityEndpoint
+
+        now = [0.0]
+        monkeypatch.setattr(homework, 'HTTP_RETRIES', 3)
+        monkeypatch.setattr(homework, 'HTTP_BACKOFF_FACTOR', 0.5)
+        monkeypatch.setattr(homework.time, 'sleep',
+                            lambda pause: now.__setitem__(0, now[0] + pause))
+        retrying = MockSession()
+        bounded = MockSession(HTTPStatus.SERVICE_UNAVAILABLE)
+        monkeypatch.setattr(homework, 'session', retrying)
+        monkeypatch.setattr(homework, 'deadline_session', bounded)
+        cycle = deadline.Deadline(1.5, lambda: now[0])
+        with pytest.raises(UnavailabilityEndpoint):
+            homework.fetch_homework_statuses({}, 0, cycle)
+        assert retrying.calls == 0, (
+            'Запрос со сроком не должен идти через сессию с повторами'
+        )
+        assert bounded.calls == 2, (
+            'Проверьте, что повторы прекращаются, когда пауза не '
+            'укладывается в срок'
+        )
+        assert now[0] <= 1.5
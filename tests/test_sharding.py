@@ -0,0 +1,244 @@
+import queue
+import threading
+import time
+
+import pytest
+
+
+class FakeProcess:
+    """Поток вместо процесса, чтобы не запускать интерпретатор."""
+
+    def __init__(self, target, args, name):
+        self.thread = threading.Thread(target=target, args=args, daemon=True)
+        self.exitcode = None
+
+    def start(self):
+        self.thread.start()
+
+    def is_alive(self):
+        return self.thread.is_alive()
+
+    def join(self, timeout=None):
+        self.thread.join(timeout)
+
+
+class FakeContext:
+    Queue = queue.Queue
+    Process = FakeProcess
+
+
+class TestHashRing:
+
+    @pytest.fixture
+    def keys(self):
+        return [f'tenant-{number}' for number in range(2000)]
+
+    def test_node_for_is_stable(self, keys):
+        import sharding
+
+        first = sharding.HashRing(['a', 'b', 'c'])
+        second = sharding.HashRing(['c', 'a', 'b'])
+        assert all(first.node_for(key) == second.node_for(key)
+                   for key in keys), (
+            'Проверьте, что владелец ключа не зависит от порядка узлов'
+        )
+        assert len(first) == 3
+
+    def test_keys_are_spread(self, keys):
+        import sharding
+
+        ring = sharding.HashRing(['a', 'b', 'c', 'd'])
+        counts = {}
+        for key in keys:
+            node = ring.node_for(key)
+            counts[node] = counts.get(node, 0) + 1
+        assert len(counts) == 4
+        assert max(counts.values()) < 2 * min(counts.values()), (
+            'Проверьте, что ключи распределяются по узлам равномерно'
+        )
+
+    def test_add_moves_only_to_new_node(self, keys):
+        import sharding
+
+        ring = sharding.HashRing(['a', 'b', 'c'])
+        before = {key: ring.node_for(key) for key in keys}
+        ring.add('d')
+        moved = [key for key in keys if ring.node_for(key) != before[key]]
+        assert all(ring.node_for(key) == 'd' for key in moved), (
+            'Проверьте, что при добавлении узла ключи переезжают '
+            'только на него'
+        )
+        assert len(moved) < len(keys) / 2
+
+    def test_remove_moves_only_removed_keys(self, keys):
+        import sharding
+
+        ring = sharding.HashRing(['a', 'b', 'c'])
+        before = {key: ring.node_for(key) for key in keys}
+        ring.remove('b')
+        for key in keys:
+            if before[key] != 'b':
+                assert ring.node_for(key) == before[key]
+            else:
+                assert ring.node_for(key) in ('a', 'c')
+
+    def test_empty_ring(self):
+        import sharding
+
+        with pytest.raises(LookupError):
+            sharding.HashRing().node_for('tenant')
+
+
+class TestSelectShard:
+
+    def test_shards_partition_tenants(self):
+        import sharding
+        from tenants import Tenant
+
+        tenants = [Tenant('token', number) for number in range(300)]
+        shards = [sharding.select_shard(tenants, index, 3)
+                  for index in range(3)]
+        ids = [tenant.tenant_id for shard in shards for tenant in shard]
+        assert sorted(ids) == sorted(t.tenant_id for t in tenants), (
+            'Проверьте, что каждая подписка попадает ровно в один шард'
+        )
+        assert all(shards)
+
+
+class TestShardCoordinator:
+
+    @pytest.fixture
+    def workers(self):
+        return {}
+
+    @pytest.fixture
+    def coordinator(self, monkeypatch, workers):
+        import sharding
+        from tenants import Tenant
+
+        stop = threading.Event()
+
+        def target(node, control, acks):
+            tenants = workers.setdefault(node, [])
+            while not stop.is_set():
+                try:
+                    sharding.apply_control(node, tenants, control, acks,
+                                           None)
+                except SystemExit:
+                    return
+                time.sleep(0.001)
+
+        tenants = [Tenant('token', number) for number in range(200)]
+        coordinator = sharding.ShardCoordinator(tenants, target=target)
+        coordinator.context = FakeContext()
+        coordinator.acks = queue.Queue()
+        yield coordinator
+        stop.set()
+
+    def wait_for(self, workers, total):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if sum(len(tenants) for tenants in workers.values()) == total:
+                return
+            time.sleep(0.01)
+
+    def test_tenants_are_polled_once(self, coordinator, workers):
+        coordinator.add_worker()
+        coordinator.add_worker()
+        node = coordinator.add_worker()
+        self.wait_for(workers, 200)
+        ids = [t.tenant_id for tenants in workers.values() for t in tenants]
+        assert len(ids) == len(set(ids)) == 200, (
+            'Проверьте, что каждую подписку опрашивает ровно один воркер'
+        )
+        coordinator.remove_worker(node)
+        self.wait_for(workers, 200)
+        assert not workers[node]
+        ids = [t.tenant_id for tenants in workers.values() for t in tenants]
+        assert len(ids) == len(set(ids)) == 200
+
+    def test_state_moves_with_tenant(self, coordinator, workers):
+        first = coordinator.add_worker()
+        self.wait_for(workers, 200)
+        for tenant in workers[first]:
+            tenant.current_date = 42
+        coordinator.add_worker()
+        self.wait_for(workers, 200)
+        moved = [t for node, tenants in workers.items() if node != first
+                 for t in tenants]
+        assert moved, 'Проверьте, что новый воркер получает подписки'
+        assert all(tenant.current_date == 42 for tenant in moved), (
+            'Проверьте, что состояние подписки переезжает вместе с ней'
+        )
+
+    def test_restart_does_not_reuse_handoff_state(self, coordinator,
+                                                  workers):
+        first = coordinator.add_worker()
+        self.wait_for(workers, 200)
+        for tenant in workers[first]:
+            tenant.current_date = 42
+        second = coordinator.add_worker()
+        self.wait_for(workers, 200)
+        assert coordinator.states == {}, (
+            'Проверьте, что копия состояния удаляется после передачи'
+        )
+        process, control = coordinator.workers[second]
+        control.put(('stop', None))
+        process.join(5)
+        moved = len(workers[second])
+        workers[second].clear()
+        coordinator.restart_dead()
+        self.wait_for(workers, 200)
+        assert len(workers[second]) == moved
+        assert all(t.current_date != 42 for t in workers[second]), (
+            'Проверьте, что перезапущенный воркер не получает устаревшее '
+            'состояние'
+        )
+
+
+class TestAddTenants:
+
+    def test_newer_state_wins(self, tmp_path):
+        import checkpoints
+        import sharding
+        from tenants import Tenant
+
+        store = checkpoints.create_checkpoint_store(
+            'sqlite', str(tmp_path / 'checkpoints.db')
+        )
+        store.save('1', {'current_date': 2000, 'seen': {}})
+        store.save('2', {'current_date': 1000, 'seen': {}})
+        payload = [
+            (sharding.tenant_spec(Tenant('token', 1)),
+             {'current_date': 1000, 'seen': {}}),
+            (sharding.tenant_spec(Tenant('token', 2)),
+             {'current_date': 3000, 'seen': {}}),
+        ]
+        tenants = []
+        sharding.add_tenants(tenants, payload, store)
+        store.close()
+        assert [tenant.current_date for tenant in tenants] == [2000, 3000], (
+            'Проверьте, что из переданного состояния и контрольной точки '
+            'берётся более свежее'
+        )
+
+
+class TestShardingConfig:
+
+    def test_file_checkpoints_and_metrics_rejected(self, monkeypatch):
+        import homework
+
+        monkeypatch.setattr(homework, 'SHARD_WORKERS', 2)
+        monkeypatch.setattr(homework, 'CHECKPOINT_BACKEND', 'file')
+        monkeypatch.setattr(homework, 'METRICS_PORT', '9100')
+        errors = homework.check_config()
+        assert homework.SHARDED_CHECKPOINT_MESSAGE in errors, (
+            'Проверьте, что воркеры с файловыми контрольными точками '
+            'отклоняются'
+        )
+        assert homework.SHARDED_METRICS_MESSAGE in errors, (
+            'Проверьте, что метрики в режиме воркеров отмечены как '
+            'неподдерживаемые'
+        )
+        monkeypatch.setattr(homework, 'SHARD_WORKERS', 1)
+        assert homework.mode_errors() == []
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+
+import pytest
+import telegram
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET = 0.5
+HEAVY_MODULES = ('telegram', 'requests', 'dotenv')
+
+
+def import_homework(*options):
+    return subprocess.run(
+        [sys.executable, *options, '-c',
+         'import sys, homework; '
+         f'print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])'],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+
+
+class TestImportTime:
+
+    def test_heavy_modules_are_deferred(self):
+        result = import_homework()
+        assert result.stdout.split() == [], (
+            'Проверьте, что telegram, requests и dotenv не импортируются '
+            'вместе с homework'
+        )
+
+    def test_import_budget(self):
+        result = import_homework('-X', 'importtime')
+        cumulative = [
+            int(line.split('|')[1])
+            for line in result.stderr.splitlines()
+            if line.split('|')[-1].strip() == 'homework'
+        ]
+        assert cumulative, 'Не найдено время импорта homework'
+        assert cumulative[0] / 1e6 < IMPORT_BUDGET, (
+            f'Импорт homework дольше {IMPORT_BUDGET} с'
+        )
+
+
+class TestCheckMode:
+
+    @pytest.fixture
+    def configured(self, monkeypatch):
+        import homework
+
+        def forbidden(*args, **kwargs):
+            raise AssertionError('В режиме проверки бот не создаётся')
+
+        monkeypatch.setattr(telegram, 'Bot', forbidden)
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        monkeypatch.setattr(homework, 'TENANTS_FILE', None)
+        return homework
+
+    def test_valid_config(self, configured):
+        assert configured.check_config() == []
+        configured.run_check()
+
+    def test_invalid_config(self, configured, monkeypatch, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text('{')
+        monkeypatch.setattr(configured, 'TELEGRAM_TOKEN', None)
+        monkeypatch.setattr(configured, 'TENANTS_FILE', str(path))
+        monkeypatch.setattr(configured, 'LEASE_BACKEND', 'redis')
+        monkeypatch.setattr(configured, 'SHARD_INDEX', 2)
+        errors = configured.check_config()
+        assert len(errors) == 4, (
+            'Проверьте, что режим проверки находит все ошибки настроек'
+        )
+        with pytest.raises(SystemExit):
+            configured.run_check()
@@ -0,0 +1,48 @@
+import pytest
+import telegram
+
+from benchmarks.stub_server import STATUSES_PATH, StubServer
+
+
+class TestStubServer:
+
+    def test_bot_against_stub(self, monkeypatch):
+        import homework
+
+        with StubServer() as server:
+            monkeypatch.setattr(
+                homework, 'ENDPOINT', f'{server.url}{STATUSES_PATH}'
+            )
+            response = homework.get_api_answer(1)
+            homeworks = homework.check_response(response)
+            bot = telegram.Bot('1234:abcdefg', base_url=f'{server.url}/bot')
+            homework.send_message_to(bot, 1, homework.parse_status(
+                homeworks[0]
+            ))
+        assert server.polls == 1
+        assert server.messages == 1
+
+    def test_stub_errors(self, monkeypatch):
+        import homework
+        from exceptions import UnavailabilityEndpoint
+
+        with StubServer(error_rate=1.0) as server:
+            monkeypatch.setattr(
+                homework, 'ENDPOINT', f'{server.url}{STATUSES_PATH}'
+            )
+            with pytest.raises(UnavailabilityEndpoint):
+                homework.get_api_answer(1)
+
+    def test_stub_telegram_throttling(self):
+        import delivery
+        import homework
+        from exceptions import SendMessageTelegramError
+
+        with StubServer(telegram_rate=1) as server:
+            bot = telegram.Bot('1234:abcdefg', base_url=f'{server.url}/bot')
+            homework.send_message_to(bot, 1, 'first')
+            with pytest.raises(SendMessageTelegramError) as error:
+                homework.send_message_to(bot, 1, 'second')
+        assert delivery.retry_after(error.value) == 1, (
+            'Проверьте, что заглушка отвечает 429 с retry_after'
+        )
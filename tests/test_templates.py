@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+
+class TestTemplates:
+
+    def test_default_locale_matches_parse_status(self):
+        import homework
+
+        message = homework.status_message('hw123', 'approved')
+        assert message == homework.parse_status(
+            {'homework_name': 'hw123', 'status': 'approved'}
+        )
+        assert message == (
+            'Изменился статус проверки работы "hw123". '
+            f'{homework.VERDICTS["approved"]}'
+        )
+
+    def test_english_locale(self):
+        import homework
+
+        message = homework.status_message('hw123', 'rejected', 'en')
+        assert message.startswith('Review status of homework "hw123"')
+        assert message.endswith(homework.EN_VERDICTS['rejected'])
+
+    def test_unknown_locale_falls_back(self):
+        import homework
+
+        assert homework.status_message('hw', 'approved', 'xx') == (
+            homework.status_message('hw', 'approved')
+        )
+
+    def test_unknown_status(self):
+        import homework
+        from exceptions import ErrorValueDictionary
+
+        with pytest.raises(ErrorValueDictionary):
+            homework.status_message('hw', 'unknown', 'en')
+
+    def test_load_custom_templates(self, tmp_path):
+        import templates
+
+        path = tmp_path / 'templates.json'
+        path.write_text(json.dumps({
+            'short': {
+                'template': '{verdict} ({homework_name})',
+                'verdicts': {'approved': 'OK'},
+            },
+        }))
+        registry = templates.TemplateRegistry('ru')
+        registry.add_locale('ru', '{homework_name}: {verdict}',
+                            {'approved': 'принято', 'rejected': 'нет'})
+        registry.load(str(path))
+        assert registry.render('hw', 'approved', 'short') == 'OK (hw)'
+        assert registry.render('hw', 'rejected', 'short') == 'hw: нет', (
+            'Проверьте, что недостающие статусы берутся из локали '
+            'по умолчанию'
+        )
+
+    def test_template_without_name(self):
+        import templates
+
+        registry = templates.TemplateRegistry('ru')
+        with pytest.raises(ValueError):
+            registry.add_locale('ru', '{verdict}', {})
+
+    def test_tenant_locale(self):
+        import homework
+
+        tenant = homework.Tenant('token', 42, locale='en')
+        messages = homework.collect_updates(tenant, {'homeworks': [
+            {'homework_name': 'hw', 'status': 'approved',
+             'date_updated': '2020-02-13T14:40:57Z'},
+        ]})
+        assert messages == [homework.status_message('hw', 'approved', 'en')]
@@ -0,0 +1,148 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+
+class TestTenants:
+
+    def test_load_tenants(self, tmp_path, random_timestamp):
+        import tenants
+
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'practicum_token': 'token1', 'chat_id': 1,
+             'current_date': random_timestamp},
+            {'practicum_token': 'token2', 'chat_id': 2, 'id': 'student'},
+        ]))
+        result = tenants.load_tenants(str(path))
+        assert len(result) == 2, (
+            'Проверьте, что загружаются все подписки из файла'
+        )
+        assert result[0].current_date == random_timestamp
+        assert result[0].tenant_id == '1'
+        assert result[1].tenant_id == 'student'
+        assert result[1].headers == {'Authorization': 'OAuth token2'}
+
+    def test_load_tenants_not_list(self, tmp_path):
+        import tenants
+
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps({'practicum_token': 'token'}))
+        with pytest.raises(TypeError):
+            tenants.load_tenants(str(path))
+
+    def test_poll_tenant_keeps_state(self, monkeypatch, random_timestamp):
+        import homework
+
+        sent = []
+        body = json.dumps({
+            'homeworks': [{
+                'homework_name': 'hw123',
+                'status': 'approved',
+                'date_updated': '2020-02-13T14:40:57Z',
+            }],
+            'current_date': random_timestamp,
+        })
+
+        class Response:
+            status_code = HTTPStatus.OK
+            headers = {}
+            content = body.encode()
+
+            def json(self):
+                return json.loads(body)
+
+        monkeypatch.setattr(homework, 'response_cache',
+                            homework.ResponseCache())
+        monkeypatch.setattr(
+            homework, 'fetch_homework_statuses',
+            lambda headers, timestamp, deadline=None: Response()
+        )
+        tenant = homework.Tenant('token', 42)
+
+        def notify(chat_id, message, key=None):
+            sent.append((chat_id, message))
+
+        homework.poll_tenant(notify, tenant)
+        homework.poll_tenant(notify, tenant)
+        assert len(sent) == 1, (
+            'Проверьте, что повторный статус не отправляется дважды'
+        )
+        assert sent[0][0] == 42
+        assert tenant.current_date == random_timestamp
+
+    def test_collect_updates_all_homeworks(self, random_timestamp):
+        import homework
+
+        tenant = homework.Tenant('token', 42)
+        response = {
+            'homeworks': [
+                {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing',
+                 'date_updated': '2020-02-14T10:00:00Z'},
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+                 'date_updated': '2020-02-13T14:40:57Z'},
+            ],
+            'current_date': random_timestamp,
+        }
+        messages = homework.collect_updates(tenant, response)
+        assert len(messages) == 2, (
+            'Проверьте, что обрабатываются все работы из ответа API'
+        )
+        assert '"hw1"' in messages[0] and '"hw2"' in messages[1], (
+            'Проверьте, что изменения отправляются в хронологическом порядке'
+        )
+        assert homework.collect_updates(tenant, response) == []
+
+        response['homeworks'][1]['status'] = 'rejected'
+        response['homeworks'][1]['date_updated'] = '2020-02-15T10:00:00Z'
+        messages = homework.collect_updates(tenant, response)
+        assert len(messages) == 1 and '"hw1"' in messages[0]
+
+    def test_collect_updates_unknown_status_keeps_index(self):
+        import homework
+        from exceptions import ErrorValueDictionary
+
+        tenant = homework.Tenant('token', 42)
+        response = {'homeworks': [
+            {'id': 2, 'homework_name': 'hw2', 'status': 'unknown',
+             'date_updated': '2020-02-14T10:00:00Z'},
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+             'date_updated': '2020-02-13T14:40:57Z'},
+        ]}
+        with pytest.raises(ErrorValueDictionary):
+            homework.collect_updates(tenant, response)
+        assert tenant.seen == {}, (
+            'Проверьте, что при ошибке разбора индекс не обновляется'
+        )
+
+    def test_compact_state(self):
+        import homework
+        import tenants
+
+        tenant = tenants.Tenant('token', 42)
+        assert not hasattr(tenant, '__dict__'), (
+            'Проверьте, что состояние подписки хранится в __slots__'
+        )
+        value = tenants.pack_homework(2, 1581604857)
+        assert tenants.unpack_homework(value) == (2, 1581604857)
+        tenant.seen['1'] = value
+        state = tenant.checkpoint(homework.STATUSES)
+        restored = tenants.Tenant('token', 42)
+        restored.restore(state, homework.STATUSES)
+        assert restored.seen == tenant.seen
+
+    def test_reviewing_keeps_fast_polls(self):
+        import homework
+
+        tenant = homework.Tenant('token', 42)
+        homework.collect_updates(tenant, {'homeworks': [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing',
+             'date_updated': '2020-02-13T14:40:57Z'},
+        ]})
+        for _ in range(3):
+            homework.reschedule(tenant, [])
+        assert tenant.interval == homework.MIN_RETRY_TIME, (
+            'Проверьте, что пустые ответы не замедляют опрос работы '
+            'на проверке'
+        )
@@ -0,0 +1,156 @@
+import json
+import time
+import urllib.error
+import urllib.request
+from http import HTTPStatus
+
+import pytest
+
+HOMEWORK = {
+    'id': 1,
+    'homework_name': 'hw123',
+    'status': 'approved',
+    'date_updated': '2020-02-13T14:40:57Z',
+}
+
+
+def post(url, payload, headers=None):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), headers=headers or {},
+        method='POST'
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+class TestWebhookServer:
+
+    @pytest.fixture
+    def server(self):
+        import webhook
+
+        server = webhook.WebhookServer(
+            webhook.Inbox(), host='127.0.0.1', secret='secret'
+        )
+        server.start()
+        yield server
+        server.stop()
+
+    @pytest.fixture
+    def url(self, server):
+        host, port = server.server_address[:2]
+        return f'http://{host}:{port}/events'
+
+    def test_event_is_queued(self, server, url):
+        started = time.monotonic()
+        status = post(url, {'tenant_id': 42, 'homeworks': [HOMEWORK]},
+                      {'X-Webhook-Secret': 'secret'})
+        assert status == HTTPStatus.ACCEPTED
+        assert server.inbox.wait(1), (
+            'Проверьте, что принятое событие будит цикл опроса'
+        )
+        assert time.monotonic() - started < 1
+        assert server.inbox.drain() == [('42', [HOMEWORK])]
+        assert len(server.inbox) == 0
+
+    @pytest.mark.parametrize('path, payload, headers, expected', [
+        ('/events', {'homeworks': []}, {}, HTTPStatus.UNAUTHORIZED),
+        ('/other', {'homeworks': []}, {'X-Webhook-Secret': 'secret'},
+         HTTPStatus.NOT_FOUND),
+        ('/events', {'homework': []}, {'X-Webhook-Secret': 'secret'},
+         HTTPStatus.BAD_REQUEST),
+        ('/events', {'homeworks': {}}, {'X-Webhook-Secret': 'secret'},
+         HTTPStatus.BAD_REQUEST),
+        ('/events', {'homeworks': []},
+         {'X-Webhook-Secret': 'secret', 'Content-Length': 'many'},
+         HTTPStatus.BAD_REQUEST),
+        ('/events', {'homeworks': []},
+         {'X-Webhook-Secret': 'secret', 'Content-Length': '-1'},
+         HTTPStatus.BAD_REQUEST),
+    ])
+    def test_rejected_requests(self, server, url, path, payload, headers,
+                               expected):
+        status = post(url.replace('/events', path), payload, headers)
+        assert status == expected, (
+            'Проверьте, что приёмник отклоняет некорректные запросы'
+        )
+        assert len(server.inbox) == 0
+
+    def test_public_host_requires_secret(self, monkeypatch):
+        import homework
+        import webhook
+
+        with pytest.raises(ValueError):
+            webhook.WebhookServer(webhook.Inbox(), host='0.0.0.0')
+        monkeypatch.setattr(homework, 'WEBHOOK_PORT', '8080')
+        monkeypatch.setattr(homework, 'WEBHOOK_HOST', '0.0.0.0')
+        monkeypatch.setattr(homework, 'WEBHOOK_SECRET', None)
+        assert webhook.INSECURE_HOST_MESSAGE in homework.check_config(), (
+            'Проверьте, что приём событий на внешнем адресе без секрета '
+            'отклоняется'
+        )
+        monkeypatch.setattr(homework, 'WEBHOOK_HOST', '127.0.0.1')
+        assert webhook.INSECURE_HOST_MESSAGE not in homework.check_config()
+
+
+class TestIngestEvents:
+
+    def test_event_is_sent_once(self):
+        import homework
+
+        tenant = homework.Tenant('token', 42, current_date=1581604800)
+        sent = []
+        events = [(None, [HOMEWORK]), ('42', [HOMEWORK])]
+        homework.ingest_events(
+            lambda chat_id, text, key=None: sent.append(text),
+            [tenant], events
+        )
+        assert len(sent) == 1, (
+            'Проверьте, что повторное событие не отправляется повторно'
+        )
+        messages = homework.collect_updates(tenant, {
+            'homeworks': [HOMEWORK], 'current_date': 1581604800
+        })
+        assert messages == [], (
+            'Проверьте, что сверка опросом не повторяет принятое событие'
+        )
+
+    def test_stale_event_is_ignored(self):
+        import homework
+
+        tenant = homework.Tenant('token', 42, current_date=1581604800)
+        sent = []
+        stale = {**HOMEWORK, 'status': 'reviewing',
+                 'date_updated': '2020-02-12T10:00:00Z'}
+        homework.ingest_events(
+            lambda chat_id, text, key=None: sent.append(text),
+            [tenant], [('42', [HOMEWORK]), ('42', [stale])]
+        )
+        assert len(sent) == 1, (
+            'Проверьте, что событие со старой датой обновления '
+            'не отправляется'
+        )
+        status, _ = homework.unpack_homework(tenant.seen['1'])
+        assert homework.STATUSES[status] == 'approved', (
+            'Проверьте, что запоздавшее событие не откатывает статус'
+        )
+
+    def test_unknown_and_invalid_events(self):
+        import homework
+        import metrics
+
+        tenants = [homework.Tenant('token', 1), homework.Tenant('token', 2)]
+        unknown = metrics.WEBHOOK_EVENTS.get('unknown')
+        invalid = metrics.WEBHOOK_EVENTS.get('invalid')
+        sent = []
+        homework.ingest_events(
+            lambda chat_id, text, key=None: sent.append(text), tenants,
+            [(None, [HOMEWORK]), ('3', [HOMEWORK]),
+             ('1', [{'homework_name': 'hw'}])]
+        )
+        assert sent == []
+        assert metrics.WEBHOOK_EVENTS.get('unknown') == unknown + 2
+        assert metrics.WEBHOOK_EVENTS.get('invalid') == invalid + 1
@@ -0,0 +1,142 @@
+import hmac
+import logging
+import threading
+from collections import deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from schema import loads
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PATH = '/events'
+MAX_BODY_SIZE = 1 << 20
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+INSECURE_HOST_MESSAGE = (
+    'Приём событий на внешнем адресе требует WEBHOOK_SECRET'
+)
+
+
+def is_insecure(host: str, secret) -> bool:
+    """Приёмник слушает не только локальный адрес и без секрета."""
+    return host not in LOCAL_HOSTS and not secret
+
+
+class Inbox:
+    """Очередь принятых событий между приёмником и циклом опроса.
+
+    `wait()` заменяет сон цикла опроса: он прерывается, как только
+    приходит событие.
+    """
+
+    def __init__(self):
+        self.events = deque()
+        self.ready = threading.Event()
+
+    def __len__(self):
+        return len(self.events)
+
+    def put(self, tenant_id, homeworks: list) -> None:
+        """Кладём событие и будим цикл опроса."""
+        self.events.append((tenant_id, homeworks))
+        self.ready.set()
+
+    def drain(self) -> list:
+        """Забираем все накопленные события."""
+        self.ready.clear()
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
+
+    def wait(self, timeout: float) -> bool:
+        """Ждём события не дольше `timeout` секунд."""
+        return self.ready.wait(timeout)
+
+    def wake(self) -> None:
+        """Будим цикл опроса без события."""
+        self.ready.set()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Принимает события об изменении статусов работ.
+
+    Тело запроса: `{"tenant_id": "...", "homeworks": [...]}`, элементы
+    `homeworks` в том же формате, что и в ответе API. Без `tenant_id`
+    событие относится к единственной подписке.
+    """
+
+    def log_message(self, format, *args):
+        """Не засоряем вывод журналом запросов."""
+
+    def _reply(self, status) -> None:
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _authorized(self) -> bool:
+        secret = self.server.secret
+        if not secret:
+            return True
+        token = self.headers.get('X-Webhook-Secret', '')
+        return hmac.compare_digest(token.encode(), secret.encode())
+
+    def _content_length(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            return None
+        return length if length >= 0 else None
+
+    def do_POST(self):
+        """Принимаем событие и ставим его в очередь."""
+        if self.path != EVENTS_PATH:
+            return self._reply(HTTPStatus.NOT_FOUND)
+        if not self._authorized():
+            return self._reply(HTTPStatus.UNAUTHORIZED)
+        length = self._content_length()
+        if length is None:
+            return self._reply(HTTPStatus.BAD_REQUEST)
+        if length > MAX_BODY_SIZE:
+            return self._reply(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        try:
+            event = loads(self.rfile.read(length))
+            homeworks = event['homeworks']
+        except (ValueError, TypeError, KeyError):
+            return self._reply(HTTPStatus.BAD_REQUEST)
+        if not isinstance(homeworks, list):
+            return self._reply(HTTPStatus.BAD_REQUEST)
+        tenant_id = event.get('tenant_id')
+        self.server.inbox.put(
+            None if tenant_id is None else str(tenant_id), homeworks
+        )
+        self._reply(HTTPStatus.ACCEPTED)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """Приёмник событий, работающий в фоновом потоке.
+
+    По умолчанию слушает только локальный адрес; на внешнем адресе
+    без секрета не запускается.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, inbox: Inbox, host='127.0.0.1', port=0, secret=None):
+        if is_insecure(host, secret):
+            raise ValueError(INSECURE_HOST_MESSAGE)
+        super().__init__((host, port), WebhookHandler)
+        self.inbox = inbox
+        self.secret = secret
+
+    def start(self) -> None:
+        """Запускаем приём событий в фоновом потоке."""
+        threading.Thread(
+            target=self.serve_forever, name='webhook', daemon=True
+        ).start()
+        logger.info('Приём событий на порту %d', self.server_address[1])
+
+    def stop(self) -> None:
+        """Останавливаем приём событий."""
+        self.shutdown()
+        self.server_close()